@@ -0,0 +1,63 @@
+"""Benchmark converters.parse_datetime against dateutil.parser.parse
+
+Timestamps are collected from DG IMD files and S1 manifests
+and parsed with both functions.
+
+Usage
+-----
+python benchmarks/bench_datetime.py --imd *.IMD --manifest */manifest.safe
+"""
+import re
+import argparse
+import timeit
+
+import dateutil.parser
+
+from satmeta import converters
+
+# same patterns as the IMD parser and the S1 manifest fields
+IMD_DATE_REGEX = re.compile(r'\s*(.*?)\s*=\s*(\d{4}\-\d{2}\-\d{2}T[\d\:\.]+[zZ]?)')
+MANIFEST_DATE_REGEX = re.compile(r'<safe:(?:startTime|stopTime)>([^<]+)<')
+
+
+def collect_timestamps(imdfiles=(), manifests=()):
+    timestamps = []
+    for path in imdfiles:
+        with open(path) as f:
+            for line in f:
+                match = IMD_DATE_REGEX.search(line)
+                if match is not None:
+                    timestamps.append(match.group(2))
+    for path in manifests:
+        with open(path) as f:
+            timestamps += MANIFEST_DATE_REGEX.findall(f.read())
+    return timestamps
+
+
+def run(timestamps, repeat=5):
+    for s in timestamps:
+        if converters.parse_datetime(s) != dateutil.parser.parse(s):
+            raise ValueError('Mismatch for timestamp \'{}\'.'.format(s))
+    print('{} timestamps'.format(len(timestamps)))
+    for name, func in [
+            ('dateutil.parser.parse', dateutil.parser.parse),
+            ('converters.parse_datetime', converters.parse_datetime)]:
+        best = min(timeit.repeat(lambda: [func(s) for s in timestamps], number=1, repeat=repeat))
+        print('{:<26s} {:8.2f} us/timestamp'.format(name, best / len(timestamps) * 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--imd', nargs='*', default=[], help='DG IMD files')
+    parser.add_argument('--manifest', nargs='*', default=[], help='S1 manifest.safe files')
+    parser.add_argument('--batch', type=int, default=1000, help='repeat timestamps to batch size')
+    args = parser.parse_args()
+    timestamps = collect_timestamps(args.imd, args.manifest)
+    if not timestamps:
+        parser.error('No timestamps found.')
+    timestamps = (timestamps * (args.batch // len(timestamps) + 1))[:args.batch]
+    run(timestamps)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark for the detector merge of S2 viewing incidence angle grids
+
+Compares the former per-detector lookup (one whole-document findall
+per detector and a Python loop of boolean masks) with the single-pass
+(detector, rows, cols) stack merged with one reduction.
+All bands and both directions are merged as for a full granule.
+
+Usage
+-----
+python benchmarks/bench_detector_merge.py MTD_TL.xml
+"""
+import argparse
+import posixpath
+import timeit
+
+import numpy as np
+
+from satmeta import converters
+from satmeta.s2 import angles_2d
+
+
+def _legacy_get_values(root, group):
+    tagname = posixpath.join(group, 'Values_List/VALUES')
+    vv = root.findall('.//{}'.format(tagname), namespaces=root.nsmap)
+    return np.vstack([np.array(v.text.split(' '), 'f4') for v in vv])
+
+
+def _legacy_merged_detectors(root, group):
+    pargroup, child = posixpath.split(group)
+    ee = root.findall('.//{}'.format(pargroup), namespaces=root.nsmap)
+    pargroup_detector_fmt = posixpath.join(pargroup + '[@detectorId="{detectorId}"]', child)
+    aa = [_legacy_get_values(root, pargroup_detector_fmt.format(**e.attrib)) for e in ee]
+    a_merged = np.empty_like(aa[0])
+    a_merged[:] = np.nan
+    for a in aa:
+        mask = np.isfinite(a)
+        a_merged[mask] = a[mask]
+    return a_merged
+
+
+def _band_ids(root):
+    grids = converters.get_elements(root, 'Viewing_Incidence_Angles_Grids')
+    return sorted({int(e.attrib['bandId']) for e in grids})
+
+
+def run(path, number=5):
+    root = converters.get_root(path)
+    groups = [
+        angles_2d._generate_group_name('Viewing_Incidence', angle_dir, bandId=band)
+        for band in _band_ids(root) for angle_dir in angles_2d.ALL_DIRS]
+    ndetectors = len(converters.get_elements(root, posixpath.dirname(groups[0])))
+
+    for group in groups:
+        np.testing.assert_array_equal(
+            _legacy_merged_detectors(root, group),
+            angles_2d._get_values_merged_detectors(root, group))
+
+    timings = {}
+    for name, func in [
+            ('per-detector findall', _legacy_merged_detectors),
+            ('stacked reduction', angles_2d._get_values_merged_detectors)]:
+        timings[name] = min(timeit.repeat(
+            lambda: [func(root, group) for group in groups],
+            number=number, repeat=3)) / number
+    print('{} groups, {} detectors per group'.format(len(groups), ndetectors))
+    for name, t in timings.items():
+        print('{:<22s} {:8.2f} ms/granule'.format(name, t * 1e3))
+    before, after = timings.values()
+    print('speedup: {:.1f}x'.format(before / after))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('granule', help='path to S2 granule MTD_TL.xml')
+    parser.add_argument('--number', type=int, default=5, help='granules per timing')
+    args = parser.parse_args()
+    run(args.granule, number=args.number)
+
+
+if __name__ == '__main__':
+    main()
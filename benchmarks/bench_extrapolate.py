@@ -0,0 +1,82 @@
+"""Benchmark for NaN extrapolation of S2 angle grids
+
+Compares the former per-grid scipy.interpolate.Rbf fit with the
+extrapolation backends of `angles_2d.extrapolate_nan`, applied to
+all grids of a granule (every band, angle and direction) at once.
+Accuracy is reported on the filled nodes relative to the Rbf output.
+The cached backends are timed both with a cold and a warm cache.
+
+Usage
+-----
+python benchmarks/bench_extrapolate.py MTD_TL.xml
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from satmeta.s2 import angles_2d
+
+
+def _legacy_extrapolate_nan(a_raw):
+    import scipy.interpolate
+    good = np.isfinite(a_raw)
+    if np.all(good) or not np.any(good):
+        return a_raw
+    x, y = np.where(good)
+    f = scipy.interpolate.Rbf(x, y, a_raw[good])
+    xbad, ybad = np.where(~good)
+    a_raw_filled = a_raw.copy()
+    a_raw_filled[~good] = f(xbad, ybad)
+    return a_raw_filled
+
+
+def _legacy(cube):
+    grids = cube.reshape((-1,) + cube.shape[-2:])
+    return np.stack([_legacy_extrapolate_nan(a) for a in grids]).reshape(cube.shape)
+
+
+def _cold(method):
+    def _run(cube):
+        angles_2d._fill_weights.cache_clear()
+        return angles_2d.extrapolate_nan(cube, method=method)
+    return _run
+
+
+def _warm(method):
+    return lambda cube: angles_2d.extrapolate_nan(cube, method=method)
+
+
+def run(path, number=3):
+    cube, _ = angles_2d.parse_angles_cube(path)
+    bad = ~np.isfinite(cube)
+    print('{} grids, {} NaN nodes'.format(
+        int(np.prod(cube.shape[:-2])), int(bad.sum())))
+
+    reference = _legacy(cube)
+    candidates = [('scipy Rbf per grid', _legacy)]
+    for method in angles_2d.EXTRAPOLATE_METHODS:
+        candidates += [
+            ('{} (cold)'.format(method), _cold(method)),
+            ('{} (warm)'.format(method), _warm(method))]
+
+    print('{:<20s} {:>10s} {:>10s} {:>10s}'.format(
+        'method', 'ms/granule', 'max |d|', 'rmse'))
+    for name, func in candidates:
+        t = min(timeit.repeat(lambda: func(cube), number=number, repeat=3)) / number
+        diff = (func(cube) - reference)[bad & np.isfinite(reference)]
+        maxdiff = np.abs(diff).max() if diff.size else 0
+        rmse = np.sqrt(np.mean(diff ** 2)) if diff.size else 0
+        print('{:<20s} {:10.2f} {:10.4f} {:10.4f}'.format(name, t * 1e3, maxdiff, rmse))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('granule', help='path to S2 granule MTD_TL.xml')
+    parser.add_argument('--number', type=int, default=3, help='granules per timing')
+    args = parser.parse_args()
+    run(args.granule, number=args.number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Memory and throughput benchmark for converters.get_root inputs
+
+Compares the former decode/re-encode path (str -> bytes copy)
+with passing bytes, an mmap'd buffer or the file path to lxml.
+Peak memory is the Python-side allocation measured with tracemalloc,
+i.e. the copies made before the document reaches lxml.
+
+Usage
+-----
+python benchmarks/bench_get_root.py s1a-iw-grd-vv-...xml [more annotation files]
+"""
+import os
+import sys
+import mmap
+import time
+import tracemalloc
+
+from satmeta import converters
+
+
+def _legacy(path):
+    with open(path) as f:
+        mstr = f.read()
+    return converters.get_root(metadatastr=mstr.encode(errors='ignore'))
+
+
+def _bytes(path):
+    with open(path, 'rb') as f:
+        return converters.get_root(metadatastr=f.read())
+
+
+def _mmap(path):
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return converters.get_root(metadatastr=buf)
+
+
+def _file(path):
+    return converters.get_root(metadatafile=path)
+
+
+CASES = {
+    'str re-encode (old)': _legacy,
+    'bytes': _bytes,
+    'mmap': _mmap,
+    'file': _file,
+}
+
+
+def run(paths, repeat=5):
+    nbytes = sum(os.path.getsize(p) for p in paths)
+    print('{} files, {:.1f} MB'.format(len(paths), nbytes / 1e6))
+    for name, func in CASES.items():
+        tracemalloc.start()
+        for path in paths:
+            func(path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for path in paths:
+                func(path)
+            best = min(best, time.perf_counter() - t0)
+        print(
+            '{:<20s} {:8.1f} MB/s   peak Python alloc: {:8.2f} MB'
+            .format(name, nbytes / best / 1e6, peak / 1e6))
+
+
+if __name__ == '__main__':
+    run(sys.argv[1:])
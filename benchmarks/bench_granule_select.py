@@ -0,0 +1,56 @@
+"""Benchmark for selective granule parsing of multi-tile S2 products
+
+Compares parsing all granules with find_parse_granule_metadata
+against the two-phase find_parse_granule_metadata_selective
+(header scan of all granules, full parse of the selected ones)
+for a tile list and/or a bounding box.
+
+Usage
+-----
+python benchmarks/bench_granule_select.py S2A_OPER_PRD_MSIL1C_[...].zip --tiles 32UNG 32UPG
+python benchmarks/bench_granule_select.py S2A_OPER_PRD_MSIL1C_[...].zip --bbox 9 55 10 56
+"""
+import time
+import argparse
+
+from satmeta.s2 import meta
+from satmeta.product import ProductHandle
+
+
+def _time(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t)
+    return best, result
+
+
+def run(path, tile_names=None, bbox=None, max_workers=None):
+    with ProductHandle(path) as handle:
+        t_all, granules = _time(lambda: meta.find_parse_granule_metadata(handle))
+        t_scan, headers = _time(lambda: meta.find_scan_granule_headers(handle))
+        t_sel, selected = _time(lambda: meta.find_parse_granule_metadata_selective(
+            handle, tile_names=tile_names, bbox=bbox, max_workers=max_workers))
+    for tile_name, gmeta in selected.items():
+        if dict(gmeta) != dict(granules[tile_name]):
+            raise RuntimeError('Granule {} differs.'.format(tile_name))
+    print('{} granules, {} selected'.format(len(granules), len(selected)))
+    print('{:<22s} {:8.1f} ms'.format('parse all', t_all * 1e3))
+    print('{:<22s} {:8.1f} ms'.format('scan headers', t_scan * 1e3))
+    print('{:<22s} {:8.1f} ms'.format('selective', t_sel * 1e3))
+    print('speedup: {:.1f}x'.format(t_all / t_sel))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('product', help='path to S2 zip file or SAFE folder')
+    parser.add_argument('--tiles', nargs='+', help='tile names to select')
+    parser.add_argument('--bbox', nargs=4, type=float, help='left bottom right top in EPSG:4326')
+    parser.add_argument('--max-workers', type=int, help='threads parsing granules')
+    args = parser.parse_args()
+    run(args.product, tile_names=args.tiles, bbox=args.bbox, max_workers=args.max_workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Import time benchmark and regression check
+
+Each module is imported in a fresh interpreter with `python -X importtime`
+and the best cumulative import time over several runs is reported.
+Exits with status 1 if a module exceeds the threshold or
+pulls in one of the heavy dependencies that should only be
+imported on first use.
+With --check only the dependencies are checked (single run,
+no timing threshold), which is stable enough to run in CI.
+
+Usage
+-----
+python benchmarks/bench_import_time.py
+python benchmarks/bench_import_time.py satmeta.l8.meta --max-ms 80
+python benchmarks/bench_import_time.py --check
+"""
+import re
+import sys
+import argparse
+import subprocess
+
+DEFAULT_MODULES = [
+    'satmeta', 'satmeta.l8.meta', 'satmeta.dg.meta', 'satmeta.s2.meta',
+    'satmeta.s1.meta', 'satmeta.pleiades.meta', 'satmeta.pneo.meta', 'satmeta.product']
+
+# must not be imported by `import <module>`
+HEAVY_DEPENDENCIES = [
+    'lxml', 'shapely', 'numpy', 'dateutil', 'affine', 'rasterio', 'dask', 'scipy',
+    'pandas', 'geopandas', 'pyproj', 'xarray', 'fsspec']
+
+IMPORTTIME_REGEX = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$')
+
+
+def importtime(module):
+    """Import module in a fresh interpreter
+
+    Returns
+    -------
+    cumulative : float
+        cumulative import time of module in ms
+    imported : set of str
+        top-level names of all modules imported
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    cumulative = None
+    imported = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_REGEX.match(line)
+        if match is None:
+            continue
+        name = match.group(4)
+        imported.add(name.split('.')[0])
+        if name == module:
+            cumulative = int(match.group(2)) / 1000
+    return cumulative, imported
+
+
+def run(modules, max_ms=None, repeat=5):
+    """Report import times, return whether any module failed
+
+    max_ms=None only checks the heavy dependencies.
+    """
+    failed = False
+    for module in modules:
+        times = []
+        for _ in range(repeat):
+            cumulative, imported = importtime(module)
+            times.append(cumulative)
+        best = min(times)
+        heavy = sorted(imported.intersection(HEAVY_DEPENDENCIES))
+        status = 'ok'
+        if max_ms is not None and best > max_ms:
+            status = 'SLOW (> {} ms)'.format(max_ms)
+            failed = True
+        if heavy:
+            status = 'HEAVY ({})'.format(', '.join(heavy))
+            failed = True
+        print('{:<24s} {:8.1f} ms  {}'.format(module, best, status))
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES, help='modules to import')
+    parser.add_argument('--max-ms', type=float, default=100, help='threshold per module in ms')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per module')
+    parser.add_argument(
+        '--check', action='store_true',
+        help='only check heavy dependencies in a single run (for CI)')
+    args = parser.parse_args()
+    if args.check:
+        args.max_ms, args.repeat = None, 1
+    if run(args.modules, args.max_ms, repeat=args.repeat):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
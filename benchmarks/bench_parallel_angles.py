@@ -0,0 +1,81 @@
+"""Scaling benchmark for parallel S2 angle resampling
+
+Times parse_resample_angles with 1 to N threads resampling the
+angle grids of one granule, and parse_resample_angles_batch with
+1 to N threads across a batch of granules.
+
+The resampling matrix products already use a multithreaded BLAS,
+so set OPENBLAS_NUM_THREADS=1 (or MKL_NUM_THREADS=1) to measure
+the scaling of the thread pool itself.
+
+Usage
+-----
+OPENBLAS_NUM_THREADS=1 python benchmarks/bench_parallel_angles.py MTD_TL.xml --res 20
+"""
+import os
+import time
+import argparse
+import itertools
+
+from satmeta.s2 import angles_2d
+
+
+def _worker_counts(max_workers):
+    n = 1
+    while n < max_workers:
+        yield n
+        n *= 2
+    yield max_workers
+
+
+def _time(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def _print_curve(title, timings):
+    print(title)
+    print('{:>8s} {:>10s} {:>8s} {:>10s}'.format('workers', 'time [s]', 'speedup', 'efficiency'))
+    base = timings[0][1]
+    for workers, t in timings:
+        print('{:8d} {:10.3f} {:8.2f} {:10.2f}'.format(
+            workers, t, base / t, base / t / workers))
+
+
+def run(paths, res=60, count=16, max_workers=None, method='separable'):
+    max_workers = max_workers or os.cpu_count()
+    kw = dict(dst_res_predefined=res, resample_method=method)
+
+    timings = []
+    for workers in _worker_counts(max_workers):
+        timings.append((workers, _time(lambda: angles_2d.parse_resample_angles(
+            paths[0], max_workers=workers, **kw))))
+    _print_curve('single granule, {} grids at {} m'.format(
+        len(angles_2d.ALL_ANGLES) * len(angles_2d.ALL_DIRS), res), timings)
+
+    batch = list(itertools.islice(itertools.cycle(paths), count))
+    timings = []
+    for workers in _worker_counts(max_workers):
+        timings.append((workers, _time(lambda: angles_2d.parse_resample_angles_batch(
+            batch, max_workers=workers, **kw), repeat=1)))
+    _print_curve('\nbatch of {} granules at {} m'.format(len(batch), res), timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('granules', nargs='+', help='paths to S2 granule MTD_TL.xml')
+    parser.add_argument('--res', type=int, default=60, choices=[10, 20, 60])
+    parser.add_argument('--count', type=int, default=16, help='granules per batch')
+    parser.add_argument('--max-workers', type=int, help='default: number of CPUs')
+    parser.add_argument('--method', default='separable', choices=['separable', 'rasterio'])
+    args = parser.parse_args()
+    run(args.granules, res=args.res, count=args.count,
+        max_workers=args.max_workers, method=args.method)
+
+
+if __name__ == '__main__':
+    main()
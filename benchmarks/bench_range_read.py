@@ -0,0 +1,116 @@
+"""Benchmark for reading S2 metadata from zip archives by byte ranges
+
+Serves the archives from a local HTTP server supporting Range
+requests and reads the product and granule metadata of each
+with s2.meta.find_parse_metadata over HTTP. Reports the requests
+and bytes transferred per product against the archive size,
+and checks the metadata against reading the local file.
+Pass --latency to simulate a remote server.
+
+Usage
+-----
+python benchmarks/bench_range_read.py S2*.zip --latency 0.02
+"""
+import os
+import re
+import time
+import shutil
+import argparse
+import threading
+import http.server
+import urllib.parse
+
+from satmeta.s2 import meta
+from satmeta.product import ProductHandle
+from satmeta.rangeio import HTTPRangeReader
+
+
+class RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serve files of a mapping name -> path with Range support"""
+
+    files = {}
+    latency = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _path(self):
+        return self.files.get(urllib.parse.unquote(self.path.lstrip('/')))
+
+    def do_HEAD(self):
+        path = self._path()
+        if path is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(os.path.getsize(path)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+    def do_GET(self):
+        path = self._path()
+        if path is None:
+            self.send_error(404)
+            return
+        time.sleep(self.latency)
+        size = os.path.getsize(path)
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        with open(path, 'rb') as f:
+            if match is None:
+                self.send_response(200)
+                self.send_header('Content-Length', str(size))
+                self.end_headers()
+                shutil.copyfileobj(f, self.wfile)
+                return
+            start = int(match.group(1))
+            end = min(int(match.group(2) or size - 1), size - 1)
+            f.seek(start)
+            data = f.read(end - start + 1)
+        self.send_response(206)
+        self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, end, size))
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(paths, latency=0):
+    """Start HTTP server for paths in a thread, return server and URLs"""
+    handler = type('Handler', (RangeRequestHandler,), dict(
+        files={os.path.basename(path): path for path in paths}, latency=latency))
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = 'http://127.0.0.1:{}/'.format(server.server_address[1])
+    return server, [base + urllib.parse.quote(os.path.basename(path)) for path in paths]
+
+
+def run(paths, latency=0):
+    server, urls = serve(paths, latency=latency)
+    try:
+        print('{:<40s} {:>10s} {:>10s} {:>8s} {:>8s} {:>9s}'.format(
+            'product', 'size [kB]', 'read [kB]', 'fraction', 'requests', 'time [s]'))
+        for path, url in zip(paths, urls):
+            t = time.perf_counter()
+            reader = HTTPRangeReader(url)
+            with ProductHandle(reader) as handle:
+                metadata = meta.find_parse_metadata(handle)
+            t = time.perf_counter() - t
+            if metadata != meta.find_parse_metadata(path):
+                raise RuntimeError('Metadata of \'{}\' differs over HTTP.'.format(path))
+            size = os.path.getsize(path)
+            print('{:<40s} {:10.1f} {:10.1f} {:8.4f} {:8d} {:9.3f}'.format(
+                os.path.basename(path)[:40], size / 1e3, reader.bytes_read / 1e3,
+                reader.bytes_read / size, reader.requests, t))
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('archives', nargs='+', help='paths to S2 zip archives')
+    parser.add_argument('--latency', type=float, default=0, help='seconds per request')
+    args = parser.parse_args()
+    run(args.archives, latency=args.latency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Memory benchmark for compact records against parser dicts
+
+Each input is parsed once and the result is round-tripped through
+pickle to create many independent copies, so that every copy owns
+its strings, numbers and nested containers like a freshly parsed one.
+Memory is the Python-side allocation measured with tracemalloc.
+Shapely geometries are allocated by GEOS and are not included.
+
+Usage
+-----
+python benchmarks/bench_records_memory.py --s2-granule MTD_TL.xml --l8 LC08_MTL.txt
+"""
+import gc
+import pickle
+import argparse
+import tracemalloc
+
+from satmeta import records
+from satmeta.s1 import meta as s1meta
+from satmeta.s2 import meta as s2meta
+from satmeta.l8 import meta as l8meta
+from satmeta.dg import meta as dgmeta
+from satmeta.pleiades import meta as plmeta
+
+MISSIONS = [
+    ('s1', s1meta.find_parse_metadata, records.S1Metadata),
+    ('s2_granule', lambda path: s2meta.parse_granule_metadata(path), records.S2GranuleMetadata),
+    ('l8', l8meta.find_parse_metadata, records.L8Metadata),
+    ('dg', dgmeta.parse_metadata, records.DGMetadata),
+    ('dimap', plmeta.find_parse_metadata, records.DimapMetadata)]
+
+
+def _measure(build, n):
+    gc.collect()
+    tracemalloc.start()
+    items = [build() for _ in range(n)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return current
+
+
+def run(name, metadata, record_cls, n):
+    if record_cls.from_dict(metadata).to_dict() != metadata:
+        raise ValueError('Record for {} does not round-trip.'.format(name))
+    data = pickle.dumps(metadata)
+    size_dict = _measure(lambda: pickle.loads(data), n)
+    size_record = _measure(lambda: record_cls.from_dict(pickle.loads(data)), n)
+    print('{:<12s} {:>9d} records  dict {:8.1f} MB  record {:8.1f} MB  ({:.1f}x)'.format(
+        name, n, size_dict / 2**20, size_record / 2**20, size_dict / size_record))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--s1', help='S1 SAFE or zip')
+    parser.add_argument('--s2-granule', help='S2 MTD_TL.xml')
+    parser.add_argument('--l8', help='Landsat 8 MTL file')
+    parser.add_argument('--dg', help='DG IMD file')
+    parser.add_argument('--dimap', help='Pleiades folder or DIM_*.XML')
+    parser.add_argument('-n', type=int, default=100000, help='number of records')
+    args = parser.parse_args()
+    paths = vars(args)
+    if not any(paths[name] for name, _, _ in MISSIONS):
+        parser.error('Specify at least one input.')
+    for name, parse, record_cls in MISSIONS:
+        if paths[name]:
+            run(name, parse(paths[name]), record_cls, args.n)
+
+
+if __name__ == '__main__':
+    main()
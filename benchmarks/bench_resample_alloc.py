@@ -0,0 +1,74 @@
+"""Allocation benchmark for resampling S2 angles over many granules
+
+Resamples all angles of a batch of granules (the given files are
+cycled until --count granules are processed), once with freshly
+allocated output arrays per call and once with a BufferPool that
+is reused across the batch.
+Reports wall time, peak traced memory and minor page faults,
+which are incurred every time a fresh output array is first written.
+
+Usage
+-----
+python benchmarks/bench_resample_alloc.py MTD_TL.xml [MTD_TL.xml ...] --count 50 --res 20
+"""
+import time
+import argparse
+import resource
+import itertools
+import tracemalloc
+
+from satmeta import utils
+from satmeta.s2 import angles_2d
+
+SCENARIOS = [
+    ('separable f8 fresh', 'separable', dict(dtype='f8'), False),
+    ('separable f4 fresh', 'separable', dict(dtype='f4'), False),
+    ('separable f4 pooled', 'separable', dict(dtype='f4'), True)]
+
+RASTERIO_SCENARIOS = [
+    ('rasterio f8 fresh', 'rasterio', dict(dtype='f8'), False),
+    ('rasterio f4 pooled', 'rasterio', dict(dtype='f4'), True)]
+
+
+def _run_batch(paths, res, method, kwargs, pooled):
+    buffers = utils.BufferPool() if pooled else None
+    for path in paths:
+        angles = angles_2d.parse_resample_angles(
+            path, dst_res_predefined=res, resample_method=method,
+            buffers=buffers, **kwargs)
+        del angles
+
+
+def run(paths, count=50, res=20, rasterio=False):
+    batch = list(itertools.islice(itertools.cycle(paths), count))
+    scenarios = SCENARIOS + (RASTERIO_SCENARIOS if rasterio else [])
+    # warm up imports and the extrapolation cache
+    _run_batch(batch[:1], res, 'separable', {}, False)
+    print('{} granules at {} m'.format(len(batch), res))
+    print('{:<22s} {:>10s} {:>12s} {:>14s}'.format(
+        'scenario', 'time [s]', 'peak [MB]', 'minor faults'))
+    for name, method, kwargs, pooled in scenarios:
+        faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+        tracemalloc.start()
+        t = time.perf_counter()
+        _run_batch(batch, res, method, kwargs, pooled)
+        t = time.perf_counter() - t
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults
+        print('{:<22s} {:10.2f} {:12.1f} {:14d}'.format(name, t, peak / 2 ** 20, faults))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('granules', nargs='+', help='paths to S2 granule MTD_TL.xml')
+    parser.add_argument('--count', type=int, default=50, help='granules per batch')
+    parser.add_argument('--res', type=int, default=20, choices=[10, 20, 60])
+    parser.add_argument(
+        '--rasterio', action='store_true', help='include the (slow) rasterio method')
+    args = parser.parse_args()
+    run(args.granules, count=args.count, res=args.res, rasterio=args.rasterio)
+
+
+if __name__ == '__main__':
+    main()
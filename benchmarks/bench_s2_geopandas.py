@@ -0,0 +1,65 @@
+"""Scaling benchmark for the parallel S2 GeoDataFrame builder
+
+Times s2.to_geopandas.meta_as_geopandas on a catalogue of S2
+products (the given files repeated up to --count) with 1 to N
+processes, and compares the pickled size of the compact granule
+records returned by the workers with that of a Series holding
+the full metadata dict.
+
+Usage
+-----
+python benchmarks/bench_s2_geopandas.py S2*.zip --count 2000
+"""
+import os
+import time
+import pickle
+import argparse
+import itertools
+
+import pandas as pd
+
+from satmeta.s2 import meta
+from satmeta.s2 import to_geopandas
+
+
+def _worker_counts(max_workers):
+    n = 1
+    while n < max_workers:
+        yield n
+        n *= 2
+    yield max_workers
+
+
+def run(paths, count=1000, max_workers=None):
+    max_workers = max_workers or os.cpu_count()
+    records = to_geopandas.get_granule_records(paths[0])
+    nbytes_records = len(pickle.dumps(records))
+    nbytes_series = len(pickle.dumps(pd.Series(meta.find_parse_metadata(paths[0]))))
+    print('pickled per product: records {} B, metadata Series {} B'.format(
+        nbytes_records, nbytes_series))
+
+    catalogue = list(itertools.islice(itertools.cycle(paths), count))
+    t = time.perf_counter()
+    gdf = to_geopandas.meta_as_geopandas(catalogue, multiprocessing_above=None)
+    base = time.perf_counter() - t
+    print('{} products, {} granules'.format(len(catalogue), len(gdf)))
+    print('{:>8s} {:>10s} {:>8s} {:>10s}'.format('workers', 'time [s]', 'speedup', 'efficiency'))
+    print('{:>8s} {:10.3f}'.format('serial', base))
+    for workers in _worker_counts(max_workers):
+        t = time.perf_counter()
+        to_geopandas.meta_as_geopandas(catalogue, multiprocessing_above=0, max_workers=workers)
+        t = time.perf_counter() - t
+        print('{:8d} {:10.3f} {:8.2f} {:10.2f}'.format(workers, t, base / t, base / t / workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('products', nargs='+', help='paths to S2 zip files or SAFE folders')
+    parser.add_argument('--count', type=int, default=1000, help='products in catalogue')
+    parser.add_argument('--max-workers', type=int, help='default: number of CPUs')
+    args = parser.parse_args()
+    run(args.products, count=args.count, max_workers=args.max_workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Micro-benchmark for the compiled XPath cache in satmeta.converters
+
+Compares per-product parse time with the cached, precompiled XPath
+lookups against plain uncached `findall` calls.
+
+Usage
+-----
+python benchmarks/bench_xpath_cache.py --s2-granule MTD_TL.xml --s1-manifest manifest.safe
+"""
+import argparse
+import timeit
+
+from satmeta import converters
+from satmeta.s1 import meta as s1meta
+from satmeta.s2 import meta as s2meta
+
+
+def _get_elements_uncached(root, tagname):
+    return root.findall('.//{}'.format(tagname), namespaces=root.nsmap)
+
+
+def _time_per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def run(s2_granule=None, s1_manifest=None, number=200):
+    cases = {}
+    if s2_granule is not None:
+        root = converters.get_root(s2_granule)
+        cases['S2 MTD_TL.xml'] = lambda: s2meta.parse_granule_metadata_xml(root)
+    if s1_manifest is not None:
+        with open(s1_manifest, 'rb') as f:
+            mstr = f.read()
+        cases['S1 manifest.safe'] = lambda: s1meta.parse_metadata(metadatastr=mstr)
+
+    get_elements_cached = converters.get_elements
+    for name, func in cases.items():
+        try:
+            converters.get_elements = _get_elements_uncached
+            before = _time_per_call(func, number)
+        finally:
+            converters.get_elements = get_elements_cached
+        after = _time_per_call(func, number)
+        print(
+            '{:<20s} before: {:8.1f} us  after: {:8.1f} us  speedup: {:.2f}x'
+            .format(name, before * 1e6, after * 1e6, before / after))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--s2-granule', help='path to S2 granule MTD_TL.xml')
+    parser.add_argument('--s1-manifest', help='path to S1 manifest.safe')
+    parser.add_argument('--number', type=int, default=200, help='calls per timing')
+    args = parser.parse_args()
+    run(s2_granule=args.s2_granule, s1_manifest=args.s1_manifest, number=args.number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark for reading S2 metadata members with a zip index cache
+
+Compares reading the product and granule metadata of S2 zip archives
+by opening each archive with zipfile (parsing the whole central
+directory every time) against a warm ZipIndexCache, which seeks
+straight to the members and only inflates their bytes.
+Run it on archives on network storage to see the effect of
+avoiding the central directory reads.
+
+Usage
+-----
+python benchmarks/bench_zip_index.py S2*.zip --cache-dir /tmp/zipindex
+"""
+import time
+import argparse
+import tempfile
+
+from satmeta.s2 import metafile
+from satmeta.zipindex import ZipIndexCache
+
+
+def _read_all(paths, index_cache=None):
+    nbytes = 0
+    for path in paths:
+        nbytes += len(metafile.read_metafile_ZIP(path, index_cache=index_cache))
+        for mstr in metafile.find_read_granule_metafiles_ZIP(path, index_cache=index_cache):
+            nbytes += len(mstr)
+    return nbytes
+
+
+def _time(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t)
+    return best, result
+
+
+def run(paths, cache_dir):
+    cache = ZipIndexCache(cache_dir)
+    t_plain, nbytes_plain = _time(lambda: _read_all(paths))
+    t_cold, _ = _time(lambda: _read_all(paths, cache), repeat=1)
+    t_warm, nbytes_warm = _time(lambda: _read_all(paths, cache))
+    if nbytes_plain != nbytes_warm:
+        raise RuntimeError('Read {} bytes with and {} without index.'.format(
+            nbytes_warm, nbytes_plain))
+    print('{} archives, {:.1f} kB of metadata'.format(len(paths), nbytes_plain / 1e3))
+    for name, t in [('zipfile', t_plain), ('index (cold)', t_cold), ('index (warm)', t_warm)]:
+        print('{:<14s} {:8.2f} ms/archive'.format(name, t / len(paths) * 1e3))
+    print('speedup (warm): {:.1f}x'.format(t_plain / t_warm))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('archives', nargs='+', help='paths to S2 zip archives')
+    parser.add_argument('--cache-dir', help='index cache directory (default: temporary)')
+    args = parser.parse_args()
+    if args.cache_dir is None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            run(args.archives, cache_dir)
+    else:
+        run(args.archives, args.cache_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
-from . import s1, s2, l8, pleiades, pneo, dg
+import importlib
+
+# mission subpackages are imported on first attribute access (PEP 562)
+_SUBPACKAGES = ('s1', 's2', 'l8', 'pleiades', 'pneo', 'dg')
 
 # keys present in all metadata dictionaries
 COMMON_KEYS = [
@@ -6,3 +9,13 @@ COMMON_KEYS = [
     ]
 
 __version__ = '2.0.1'
+
+
+def __getattr__(name):
+    if name in _SUBPACKAGES:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()).union(_SUBPACKAGES))
@@ -1,15 +1,39 @@
+import re
+import datetime
 from pathlib import Path
 import logging
 import codecs
+import functools
+from collections import defaultdict
 
-import lxml.etree
-import shapely.geometry
-import dateutil.parser
+# lxml, shapely, numpy and dateutil are imported on first use
+# to keep importing the mission modules cheap
 
 logger = logging.getLogger(__name__)
 
+_ISO_DATETIME_REGEX = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?'
+    r'(Z|[+-]\d{2}:?\d{2})?$')
+
 
 def get_root(metadatafile=None, metadatastr=None):
+    """Parse XML document and get its root
+
+    Parameters
+    ----------
+    metadatafile : str or Path or file-like, optional
+        path to XML file or open binary file
+        parsed directly from the file
+    metadatastr : bytes or bytes-like or str, optional
+        XML document contents
+        bytes, memoryview, bytearray and mmap
+        are passed to lxml without copying
+
+    Returns
+    -------
+    lxml XML root
+    """
+    import lxml.etree
     if isinstance(metadatafile, Path):
         metadatafile = str(metadatafile)
     if metadatafile is not None:
@@ -20,12 +44,9 @@ def get_root(metadatafile=None, metadatastr=None):
                 metadatastr = fin.read()
     elif metadatastr is None:
         raise ValueError('Either metadatafile or metadatastr must be specified.')
-    try:
-        # convert to bytes
-        metadatastr = metadatastr.encode(errors='ignore')
-    except AttributeError:
-        # str is already bytes
-        pass
+    if isinstance(metadatastr, str):
+        # lxml does not accept str with encoding declaration
+        metadatastr = metadatastr.encode('utf-8')
     return lxml.etree.fromstring(metadatastr)
 
 
@@ -40,8 +61,143 @@ def _get_value(element, attrname=None, to_type=None):
         return to_type(s)
 
 
+def _split_first_step(path):
+    """Split path into first location step and remainder"""
+    depth = 0
+    for i, c in enumerate(path):
+        if c == '[':
+            depth += 1
+        elif c == ']':
+            depth -= 1
+        elif c == '/' and depth == 0:
+            return path[:i], path[i + 1:]
+    return path, ''
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_path(tagname, namespaces):
+    """Compile descendant search for tagname (cached process-wide)
+
+    Parameters
+    ----------
+    tagname : str
+        ElementPath-like tag expression
+        e.g. 'safe:relativeOrbitNumber[@type=\'start\']'
+    namespaces : tuple of (prefix, uri)
+        hashable namespace map
+
+    Returns
+    -------
+    tag : str or None
+        qualified tag of the first step to scan for
+        None if the expression must be evaluated as a whole
+    tag_only : bool
+        whether the tag alone selects the elements
+    xpath : lxml.etree.XPath or None
+        compiled expression to evaluate on root if tag is None
+    """
+    import lxml.etree
+    nsdict = dict(namespaces)
+    step, rest = _split_first_step(tagname)
+    name = step.split('[', 1)[0]
+    if not name or name == '*' or name.endswith(':*') or '(' in name:
+        return None, False, lxml.etree.XPath('.//' + tagname, namespaces=nsdict)
+    prefix, _, localname = name.rpartition(':')
+    tag = '{{{}}}{}'.format(nsdict[prefix], localname) if prefix else localname
+    return tag, (step == name and not rest), None
+
+
+class IndexedRoot(object):
+    """XML root with an index of descendant elements by tag
+
+    The tree is walked once when the index is built.
+    Can be used in place of the root in all `converters` functions.
+
+    Parameters
+    ----------
+    root : lxml XML root
+        root of XML document
+    tagnames : list of str, optional
+        tag expressions that will be looked up
+        only the tags of their first steps are indexed
+        and other tags are found by scanning the tree
+        default: index all elements
+    """
+
+    def __init__(self, root, tagnames=None):
+        if isinstance(root, IndexedRoot):
+            root = root.root
+        self.root = root
+        self.nsmap = root.nsmap
+        self.index = {}
+        self.indexed_all = False
+        self.indexed_tags = set()
+        if None in self.nsmap:
+            # default namespaces are looked up with findall
+            return
+        if tagnames is None:
+            import lxml.etree
+            tags = [lxml.etree.Element]
+        else:
+            namespaces = tuple(sorted(self.nsmap.items()))
+            tags = {_compile_path(t, namespaces)[0] for t in tagnames}
+            tags.discard(None)
+        index = defaultdict(list)
+        if tags:
+            for e in root.iterdescendants(*tags):
+                index[e.tag].append(e)
+        self.index = dict(index)
+        self.indexed_all = tagnames is None
+        if not self.indexed_all:
+            self.indexed_tags = tags
+
+    def __getattr__(self, name):
+        return getattr(self.root, name)
+
+    def iterdescendants(self, tag):
+        """Iterate over descendant elements with tag"""
+        if self.indexed_all or tag in self.indexed_tags:
+            return iter(self.index.get(tag, []))
+        return self.root.iterdescendants(tag)
+
+
+def get_elements(root, tagname):
+    """Get all elements matching tagname anywhere below root
+
+    The tag expression is compiled once per namespace map.
+    Elements are found by a C-level scan for the first step
+    (or an IndexedRoot lookup) and the remaining expression
+    is evaluated only on their parents.
+    """
+    nsmap = root.nsmap
+    if None in nsmap:
+        # default namespaces are not supported by XPath
+        return root.findall('.//{}'.format(tagname), namespaces=nsmap)
+    tag, tag_only, xpath = _compile_path(tagname, tuple(sorted(nsmap.items())))
+    if tag is None:
+        if isinstance(root, IndexedRoot):
+            root = root.root
+        return xpath(root)
+    candidates = root.iterdescendants(tag)
+    if tag_only:
+        return list(candidates)
+    parents = dict.fromkeys(e.getparent() for e in candidates)
+    if _any_nested(parents):
+        # matches of one parent could lie inside another parent,
+        # so per-parent results would be reordered or repeated
+        return root.findall('.//{}'.format(tagname), namespaces=nsmap)
+    return [e for parent in parents for e in parent.findall(tagname, namespaces=nsmap)]
+
+
+def _any_nested(elements):
+    """Whether any of the elements is a descendant of another"""
+    if len(elements) < 2:
+        return False
+    return any(a in elements for e in elements for a in e.iterancestors())
+
+
 def get_single(root, tagname, attrname=None, to_type=None):
-    results = root.findall('.//{}'.format(tagname), namespaces=root.nsmap)
+    results = get_elements(root, tagname)
     if len(results) != 1:
         raise ValueError(
                 'Expected to find a single instance of tag \'{}\'. '
@@ -50,41 +206,124 @@ def get_single(root, tagname, attrname=None, to_type=None):
 
 
 def get_instance(root, tagname, attrname=None, index=0, to_type=None):
-    result = root.findall('.//{}'.format(tagname), namespaces=root.nsmap)[index]
+    result = get_elements(root, tagname)[index]
     return _get_value(result, attrname=attrname, to_type=to_type)
 
 
 def get_all(root, tagname, attrname=None, to_type=None):
-    results = root.findall('.//{}'.format(tagname), namespaces=root.nsmap)
+    results = get_elements(root, tagname)
     return [_get_value(e, attrname=attrname, to_type=to_type) for e in results]
 
 
+def _parse_tzinfo(s):
+    if s is None:
+        return None
+    if s == 'Z':
+        return datetime.timezone.utc
+    sign = -1 if s[0] == '-' else 1
+    hours, minutes = int(s[1:3]), int(s[-2:])
+    return datetime.timezone(sign * datetime.timedelta(hours=hours, minutes=minutes))
+
+
+def parse_datetime(s):
+    """Parse ISO-8601 timestamp
+
+    Strict 'YYYY-MM-DDTHH:MM:SS[.f][Z|+HH:MM]' timestamps are parsed
+    with a precompiled pattern. Fractional seconds are truncated to
+    microseconds. Anything else falls back to dateutil.parser.parse.
+    """
+    match = _ISO_DATETIME_REGEX.match(s)
+    if match is None:
+        import dateutil.parser
+        return dateutil.parser.parse(s)
+    year, month, day, hour, minute, second, fraction, tz = match.groups()
+    microsecond = int(fraction[:6].ljust(6, '0')) if fraction else 0
+    try:
+        return datetime.datetime(
+            int(year), int(month), int(day), int(hour), int(minute), int(second),
+            microsecond, tzinfo=_parse_tzinfo(tz))
+    except ValueError:
+        import dateutil.parser
+        return dateutil.parser.parse(s)
+
+
 def get_single_date(root, tagname):
-    return get_single(root, tagname, to_type=dateutil.parser.parse)
+    return get_single(root, tagname, to_type=parse_datetime)
 
 
 def _parse_coordinates_str(cs):
-    return [tuple(map(float, s.split(','))) for s in cs.split()]
+    """Parse 'x,y x,y ...' string into (n, 2) array"""
+    import numpy as np
+    return np.array(cs.replace(',', ' ').split(), dtype='f8').reshape(-1, 2)
 
 
 def _parse_coordinates_str_yx(cs):
-    return [tuple(map(float, s.split(',')[::-1])) for s in cs.split()]
+    """Parse 'y,x y,x ...' string into (n, 2) array of x, y"""
+    return _parse_coordinates_str(cs)[:, ::-1]
+
+
+def coords_to_polygon(coords):
+    """Create Polygon from (n, 2) exterior ring coordinates
+
+    The ring is closed automatically
+    """
+    import numpy as np
+    import shapely
+    return shapely.polygons(np.asarray(coords, dtype='f8'))
 
 
-def _coords_to_polygon(coords):
-    return shapely.geometry.shape(dict(type='Polygon', coordinates=[coords]))
+def coords_to_polygons(coords_list):
+    """Create Polygons from many coordinate arrays in one vectorized call
+
+    Parameters
+    ----------
+    coords_list : sequence of array-like
+        (n_i, 2) exterior ring coordinates
+        rings are closed automatically
+        and may have different lengths
+
+    Returns
+    -------
+    ndarray of shapely.Polygon
+    """
+    import numpy as np
+    import shapely
+    coords_list = [np.asarray(coords, dtype='f8') for coords in coords_list]
+    if not coords_list:
+        return np.empty(0, dtype=object)
+    indices = np.repeat(np.arange(len(coords_list)), [len(c) for c in coords_list])
+    rings = shapely.linearrings(np.concatenate(coords_list), indices=indices)
+    return shapely.polygons(rings)
 
 
 def parse_coords(coordinates_str):
     """Parse GeoJSON-like coordinates string as a Polygon"""
     coords = _parse_coordinates_str(coordinates_str)
-    return _coords_to_polygon(coords)
+    return coords_to_polygon(coords)
 
 
 def parse_coords_yx(coordinates_str):
     """Parse GeoJSON-like coordinates string as a Polygon"""
     coords = _parse_coordinates_str_yx(coordinates_str)
-    return _coords_to_polygon(coords)
+    return coords_to_polygon(coords)
+
+
+def parse_coords_many(coordinates_strs, yx=False):
+    """Parse many GeoJSON-like coordinates strings as Polygons
+
+    Parameters
+    ----------
+    coordinates_strs : sequence of str
+        coordinates strings
+    yx : bool
+        coordinates are given as y,x pairs
+
+    Returns
+    -------
+    ndarray of shapely.Polygon
+    """
+    parse = _parse_coordinates_str_yx if yx else _parse_coordinates_str
+    return coords_to_polygons([parse(cs) for cs in coordinates_strs])
 
 
 def get_single_polygon(root, tagname):
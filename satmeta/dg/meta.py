@@ -1,5 +1,7 @@
 from satmeta.dg import parser
 from satmeta.dg import postprocessing
+from satmeta.lazy import LazyMetadata
+from satmeta.records import DGMetadata
 
 
 def _tastes_like_imd(s):
@@ -28,7 +30,7 @@ def parse_metadata_raw(imdfile_or_str):
     return parser.parse_metadata_raw(lines)
 
 
-def parse_metadata(imdfile_or_str):
+def parse_metadata(imdfile_or_str, lazy=False, record=False):
     """Parse metadata from IMD including derived attributes
 
     Parameters
@@ -36,13 +38,22 @@ def parse_metadata(imdfile_or_str):
     imdfile_or_str : str
         path to IMD file
         or string with complete IMD file contents
+    lazy : bool
+        return LazyMetadata building footprints
+        and transform on first access
+    record : bool
+        return compact records.DGMetadata
 
     Returns
     -------
-    dict
+    dict or LazyMetadata or DGMetadata
         parsed metadata
     """
     mtd = parse_metadata_raw(imdfile_or_str)
-    mtd_postproc = postprocessing.postprocess_metadata(mtd)
+    mtd_postproc = postprocessing.postprocess_metadata(mtd, lazy=lazy)
+    if lazy:
+        mtd = LazyMetadata(mtd)
     mtd.update(mtd_postproc)
+    if record:
+        return DGMetadata.from_dict(mtd)
     return mtd
@@ -1,5 +1,6 @@
 import re
-import dateutil.parser
+
+from satmeta import converters
 
 RENAME_BAND_GROUPS = {
     'P': 'PAN',
@@ -100,7 +101,7 @@ def parse_metadata_raw(lines):
         dates = r_dates.search(line)
         if dates is not None:
             key, value = dates.groups()
-            g[key] = dateutil.parser.parse(value)
+            g[key] = converters.parse_datetime(value)
             continue
 
         floats = r_floats.search(line)
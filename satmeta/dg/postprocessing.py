@@ -1,7 +1,7 @@
 import re
 
-import shapely.geometry
-import affine
+from satmeta import converters
+from satmeta.lazy import build_metadata
 
 ALIASES = {
     'spacecraft': 'satId',
@@ -48,10 +48,11 @@ def _get_points_xy(cdict):
 
 
 def _points_to_polygon(points):
-    return shapely.geometry.Polygon(points)
+    return converters.coords_to_polygon(points)
 
 
 def _get_transform(projection_meta):
+    import affine
     coefs = (
         projection_meta[key]
         for key in [
@@ -61,17 +62,20 @@ def _get_transform(projection_meta):
     return affine.Affine(a, b, c, d, -e, f)
 
 
-def postprocess_metadata(mtd_raw):
+def postprocess_metadata(mtd_raw, lazy=False):
     """Further derive types from raw metadata
 
     Parameters
     ----------
     mtd_raw : dict
         metadata parsed with parsing.parse_metadata_raw
+    lazy : bool
+        return LazyMetadata building footprints
+        and transform on first access
 
     Returns
     -------
-    dict
+    dict or LazyMetadata
         postprocessed metadata
     """
     mtd_postproc = {}
@@ -81,14 +85,15 @@ def postprocess_metadata(mtd_raw):
     for key in copy_imgm:
         mtd_postproc[key] = imgm[key]
     mtd_postproc['angles'] = _get_angles(imgm)
-    mtd_postproc['footprint'] = _points_to_polygon(_get_points_lonlat(bm))
     mtd_postproc['sensing_time'] = (
         imgm['firstLineTime'] if 'firstLineTime' in imgm
         else mtd_raw['earliestAcqTime'])
     mtd_postproc['calibration'] = _get_calibration_constants(mtd_raw['band_meta'])
-    mtd_postproc['transform'] = _get_transform(mtd_raw['projection_meta'])
-    mtd_postproc['footprint_projected'] = _points_to_polygon(
-        _get_points_xy(mtd_raw['projection_meta']))
     for dst, src in ALIASES.items():
         mtd_postproc[dst] = mtd_postproc[src]
-    return mtd_postproc
+    projm = mtd_raw['projection_meta']
+    derived = {
+        'footprint': lambda m: _points_to_polygon(_get_points_lonlat(bm)),
+        'transform': lambda m: _get_transform(projm),
+        'footprint_projected': lambda m: _points_to_polygon(_get_points_xy(projm))}
+    return build_metadata(mtd_postproc, derived, lazy=lazy)
@@ -0,0 +1,134 @@
+"""Parser for DIMAP V2 meta data shared by Pleiades and Pleiades Neo"""
+from satmeta import converters
+from satmeta.exceptions import MetaDataError
+from satmeta.schema import Field, Schema
+
+# angles are read from the first image center block
+_center = 'Located_Geometric_Values[LOCATION_TYPE="Center"]'
+
+RENAME_ANGLES = {
+    'SUN_AZIMUTH': 'sun_azimuth',
+    'SUN_ELEVATION': 'sun_elevation',
+    'AZIMUTH_ANGLE': 'sensor_azimuth',
+    'INCIDENCE_ANGLE': 'sensor_zenith'}
+
+COPY_RENAME = {
+    'SOURCE_ID': 'title'}
+
+COPY_RENAME_INT = {
+    'NROWS': 'height',
+    'NCOLS': 'width',
+    'NBANDS': 'count'}
+
+
+def _dimap_fields():
+    """Declare DIMAP meta data fields"""
+    fields = {
+        'imaging_date': Field('IMAGING_DATE'),
+        'imaging_time': Field('IMAGING_TIME'),
+        'lons': Field('Dataset_Extent/Vertex/LON', to_type=float, many=True),
+        'lats': Field('Dataset_Extent/Vertex/LAT', to_type=float, many=True),
+        'band_ids': Field('Band_Radiance/BAND_ID', many=True),
+        'gains': Field('Band_Radiance/GAIN', to_type=float, many=True),
+        'biases': Field('Band_Radiance/BIAS', to_type=float, many=True),
+        'band_order': Field('Band_Display_Order/*', many=True),
+        # ntiles sometimes missing
+        'ntiles': Field('NTILES', to_type=int, required=False)}
+    for name, key in COPY_RENAME.items():
+        fields[key] = Field(name)
+    for name, key in COPY_RENAME_INT.items():
+        fields[key] = Field(name, to_type=int)
+    return fields
+
+
+DIMAP_SCHEMA = Schema(_dimap_fields())
+
+
+def _spacecraft_schema(spacecraft_tags):
+    return Schema({
+        ('spacecraft', name): Field(name) for name in spacecraft_tags})
+
+
+def _get_angles(root):
+    center = converters.get_elements(root, _center)[0]
+    return {
+        key: converters.get_single(center, name, to_type=float)
+        for name, key in RENAME_ANGLES.items()}
+
+
+def _get_footprint(lons, lats):
+    return converters.coords_to_polygon(list(zip(lons, lats)))
+
+
+def _get_gain_bias(band_ids, gains, biases):
+    # the lists are extracted separately, so a Band_Radiance element
+    # missing a child would shift the values of all later bands
+    if not len(band_ids) == len(gains) == len(biases):
+        raise MetaDataError(
+            'Found {} BAND_ID, {} GAIN and {} BIAS values in Band_Radiance.'
+            .format(len(band_ids), len(gains), len(biases)))
+    gain_bias = {}
+    for key, gain, bias in zip(band_ids, gains, biases):
+        gain_bias[key] = dict(gain=gain, bias=bias)
+    return gain_bias
+
+
+def _postproc_gain_bias_values(gain_bias, band_order):
+    values = dict(gain=[], bias=[])
+    for band in band_order:
+        for key in ['gain', 'bias']:
+            values[key].append(gain_bias[band][key])
+    return values
+
+
+def parse_metadata_xml(root, spacecraft_tags):
+    """Parse DIMAP meta data XML
+
+    Parameters
+    ----------
+    root : lxml XML root
+        root of DIM_*.XML document
+    spacecraft_tags : list of str
+        tags that are joined to form the spacecraft name
+        e.g. ['INSTRUMENT', 'INSTRUMENT_INDEX']
+
+    Returns
+    -------
+    dict
+        parsed metadata
+    """
+    schema = DIMAP_SCHEMA + _spacecraft_schema(spacecraft_tags)
+    root = converters.IndexedRoot(root, tagnames=schema.tagnames + [_center])
+    values = schema.extract(root)
+    meta = {}
+    meta['angles'] = _get_angles(root)
+    meta['spacecraft'] = ''.join(
+        values.pop(('spacecraft', name)) for name in spacecraft_tags)
+    datestr = '{}T{}'.format(values.pop('imaging_date'), values.pop('imaging_time'))
+    meta['sensing_time'] = converters.parse_datetime(datestr)
+    meta['footprint'] = _get_footprint(values.pop('lons'), values.pop('lats'))
+    meta['calibration'] = _get_gain_bias(
+        values.pop('band_ids'), values.pop('gains'), values.pop('biases'))
+    meta['band_order'] = values.pop('band_order')
+    meta['calibration_values'] = _postproc_gain_bias_values(
+        meta['calibration'], meta['band_order'])
+    meta.update(values)
+    return meta
+
+
+def parse_metadata(xmlfile_or_str, spacecraft_tags):
+    """Parse DIMAP meta data from file or string
+
+    Parameters
+    ----------
+    xmlfile_or_str : str or bytes
+        path to DIM_*.XML file
+        or string / bytes with complete XML file contents
+    spacecraft_tags : list of str
+        tags that are joined to form the spacecraft name
+    """
+    if isinstance(xmlfile_or_str, bytes) or xmlfile_or_str.startswith('<?xml'):
+        root = converters.get_root(metadatastr=xmlfile_or_str)
+    else:
+        root = converters.get_root(metadatafile=xmlfile_or_str)
+    return parse_metadata_xml(root, spacecraft_tags=spacecraft_tags)
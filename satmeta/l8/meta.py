@@ -1,8 +1,16 @@
 from satmeta.l8.metafile import read_metafile
 from satmeta.l8.parser import parse_metadata
+from satmeta.records import L8Metadata
 
 
-def find_parse_metadata(path):
-    """Find and parse a metadata file in a folder, TAR or MTD file path"""
+def find_parse_metadata(path, lazy=False, record=False):
+    """Find and parse a metadata file in a folder, TAR or MTD file path
+
+    With lazy, footprints are built on first access.
+    With record, return compact records.L8Metadata.
+    """
     mstr = read_metafile(path)
-    return parse_metadata(mstr.splitlines())
+    metadata = parse_metadata(mstr.splitlines(), lazy=lazy)
+    if record:
+        return L8Metadata.from_dict(metadata)
+    return metadata
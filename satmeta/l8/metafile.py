@@ -1,7 +1,6 @@
 import os
 import glob
 import shutil
-import tarfile
 
 
 def _find_metafile_in_names(names):
@@ -31,6 +30,7 @@ def read_metafile_folder(indir):
 
 
 def read_metafile_TAR(infile):
+    import tarfile
     with tarfile.open(infile) as tar:
         names = tar.getnames()
         mtl_member = _find_metafile_in_names(names)
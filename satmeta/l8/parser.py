@@ -2,8 +2,8 @@ import re
 from itertools import product
 from collections import defaultdict
 
-import shapely.geometry
-import dateutil.parser
+from satmeta import converters
+from satmeta.lazy import build_metadata
 
 NBANDS = {
     'REFLECTANCE': 9,
@@ -143,7 +143,7 @@ def _postprocess_sensing_time(metadata):
     datestr = metadata.pop('date_acquired')
     timestr = metadata.pop('scene_center_time')
     dtstring = datestr + 'T' + timestr
-    metadata['sensing_time'] = dateutil.parser.parse(dtstring)
+    metadata['sensing_time'] = converters.parse_datetime(dtstring)
 
 
 def _postprocess_title(metadata):
@@ -155,7 +155,7 @@ def _postprocess_spacecraft(metadata):
     metadata['spacecraft'] = ''.join(re.search(r'(L)ANDSAT_(\d)', scid).groups())
 
 
-def _get_footprint(metadata, xext, yext):
+def _pop_footprint_vertices(metadata, xext, yext):
     corners = [''.join(pair) for pair in product('UL', 'LR')]
     x_corners = [corner + xext for corner in corners]
     y_corners = [corner + yext for corner in corners]
@@ -164,11 +164,10 @@ def _get_footprint(metadata, xext, yext):
         x = metadata.pop(xkey)
         y = metadata.pop(ykey)
         vertices.append((x, y))
-    vertices.append(vertices[0])
-    return shapely.geometry.Polygon(vertices)
+    return vertices
 
 
-def parse_metadata(lines):
+def parse_metadata(lines, lazy=False):
     """Parse Landsat 8 metadata from iterable of lines
 
     Parameters
@@ -176,20 +175,26 @@ def parse_metadata(lines):
     lines : iterable of lines in MTD file
         can be file-like object
         or list of str
+    lazy : bool
+        return LazyMetadata building the footprint
+        polygons on first access
 
     Returns
     -------
-    dict
+    dict or LazyMetadata
         metadata
     """
     metadata = _plain_parse_metadata(lines)
-    metadata['footprint'] = _get_footprint(metadata, xext='_LON', yext='_LAT')
-    metadata['footprint_projected'] = _get_footprint(metadata,
-                                                     xext='_PROJECTION_X', yext='_PROJECTION_Y')
+    vertices = _pop_footprint_vertices(metadata, xext='_LON', yext='_LAT')
+    vertices_projected = _pop_footprint_vertices(
+        metadata, xext='_PROJECTION_X', yext='_PROJECTION_Y')
     _postprocess_rescaling(metadata['rescaling'])
     # rename keys to lowercase
     metadata = {_remove_prefix(k).lower(): v for k, v in metadata.items()}
     _postprocess_sensing_time(metadata)
     _postprocess_spacecraft(metadata)
     _postprocess_title(metadata)
-    return metadata
+    derived = {
+        'footprint': lambda m: converters.coords_to_polygon(vertices),
+        'footprint_projected': lambda m: converters.coords_to_polygon(vertices_projected)}
+    return build_metadata(metadata, derived, lazy=lazy)
@@ -0,0 +1,108 @@
+"""Metadata mapping with lazily computed fields"""
+from collections.abc import MutableMapping
+
+
+class _Pending(object):
+    """Placeholder for a field that has not been computed yet"""
+
+    __slots__ = ('func',)
+
+    def __init__(self, func):
+        self.func = func
+
+
+class LazyMetadata(MutableMapping):
+    """Metadata mapping that computes derived fields on first access
+
+    Derived fields are computed once and cached.
+    Otherwise behaves like a dict, including key order.
+    Pickling computes all pending fields, so the
+    callables (often closures) need not be picklable.
+
+    Parameters
+    ----------
+    data : dict, optional
+        values that are already parsed
+    derived : dict, optional
+        key -> callable taking this mapping
+        and returning the value
+    """
+
+    def __init__(self, data=None, derived=None):
+        self._data = dict(data or {})
+        for key, func in (derived or {}).items():
+            self._data[key] = _Pending(func)
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        if isinstance(value, _Pending):
+            value = self._data[key] = value.func(self)
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        items = (
+            '{!r}: {}'.format(k, '<pending>' if isinstance(v, _Pending) else repr(v))
+            for k, v in self._data.items())
+        return '{}({{{}}})'.format(type(self).__name__, ', '.join(items))
+
+    def is_computed(self, key):
+        """Whether the value for key is available without computation"""
+        return not isinstance(self._data[key], _Pending)
+
+    def update(self, other=(), **kwargs):
+        """Update from mapping, keeping pending fields of LazyMetadata pending"""
+        if isinstance(other, LazyMetadata):
+            self._data.update(other._data)
+            other = ()
+        super(LazyMetadata, self).update(other, **kwargs)
+
+    def __reduce__(self):
+        return type(self), (self.to_dict(),)
+
+    def copy(self):
+        new = type(self)()
+        new._data = self._data.copy()
+        return new
+
+    def to_dict(self):
+        """Compute all fields and return a plain dict"""
+        return {key: self[key] for key in self}
+
+
+def build_metadata(data, derived, lazy=False):
+    """Create metadata with derived fields
+
+    Parameters
+    ----------
+    data : dict
+        values that are already parsed
+    derived : dict
+        key -> callable taking the metadata mapping
+    lazy : bool
+        return LazyMetadata that computes derived
+        fields on first access
+        otherwise compute all and return dict
+
+    Returns
+    -------
+    dict or LazyMetadata
+    """
+    metadata = LazyMetadata(data, derived)
+    if lazy:
+        return metadata
+    return metadata.to_dict()
@@ -2,12 +2,19 @@ import os
 
 from satmeta.pleiades.metafile import find_metafile_in_folder
 from satmeta.pleiades.parser import parse_metadata
+from satmeta.records import DimapMetadata
 
 
-def find_parse_metadata(path):
-    """Find and parse a metadata file in a folder, TAR or MTD file path"""
+def find_parse_metadata(path, record=False):
+    """Find and parse a metadata file in a folder, TAR or MTD file path
+
+    With record, return compact records.DimapMetadata
+    """
     if os.path.isdir(path):
         xmlfile = find_metafile_in_folder(path)
     else:
         xmlfile = path
-    return parse_metadata(xmlfile)
+    metadata = parse_metadata(xmlfile)
+    if record:
+        return DimapMetadata.from_dict(metadata)
+    return metadata
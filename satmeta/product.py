@@ -0,0 +1,275 @@
+"""Handle on a SAFE product as zip archive or unpacked folder"""
+import os
+import re
+import fnmatch
+import zipfile
+import logging
+import contextlib
+
+from .exceptions import MetaDataError
+from .zipindex import ZipIndex
+from .rangeio import (
+    RangeReader, FileRangeReader, open_range_reader, is_range_source, as_file, _is_url)
+
+logger = logging.getLogger(__name__)
+
+
+def _common_root(names):
+    """Top-level folder shared by all names ('' if none)"""
+    if not names:
+        return ''
+    root = names[0].split('/', 1)[0] + '/'
+    if all(name.startswith(root) for name in names):
+        return root
+    return ''
+
+
+def _scan_folder(path):
+    """Relative posix paths of all files below path in one scandir walk"""
+    names = []
+    stack = ['']
+    while stack:
+        rel = stack.pop()
+        with os.scandir(os.path.join(path, rel)) as it:
+            for entry in it:
+                name = rel + entry.name
+                if entry.is_dir():
+                    stack.append(name + '/')
+                else:
+                    names.append(name)
+    return sorted(names)
+
+
+class ProductHandle(object):
+    """SAFE product opened once with an index of its members
+
+    A zip archive is opened once and its member list read once.
+    A folder is walked once. All lookups are served from that index.
+    Member names are relative to the product root,
+    i.e. without the top-level `.SAFE` folder of zip archives,
+    e.g. 'manifest.safe' or 'GRANULE/<granule>/MTD_TL.xml'.
+
+    Can be passed instead of a path to the `find_parse_*`
+    functions of the S1 and S2 modules.
+
+    Zip archives can also be read remotely from a URL
+    (http(s) or fsspec, e.g. s3://) or any byte-range source.
+    Only the central directory and the members read
+    are then transferred (see `bytes_read`).
+
+    Parameters
+    ----------
+    path : str or Path or rangeio.RangeReader
+        path to zip file or SAFE folder,
+        URL of zip file or byte-range source
+        (see rangeio.open_range_reader)
+        a RangeReader passed in is not closed with the handle
+    index_cache : zipindex.ZipIndexCache, optional
+        read the zip member index from this cache
+        instead of the central directory and read members
+        by seeking directly to their data
+        (local zip files only)
+
+    Example
+    -------
+    >>> with ProductHandle('S2A_MSIL1C_[...].zip') as handle:
+    ...     metadata = s2meta.find_parse_metadata(handle)
+    ...     urls = s2unzip.get_bandfile_urls(handle, bands=[2, 3, 4])
+    """
+
+    def __init__(self, path, index_cache=None):
+        self._archive = None
+        self._reader = None
+        self._zipindex = None
+        self._zipfile = None
+        self._match_cache = {}
+        self._remote = is_range_source(path)
+        # range readers passed in are left open on close
+        self._owns_reader = not isinstance(path, RangeReader)
+        try:
+            self._open(path, index_cache)
+        except BaseException:
+            # e.g. corrupt central directory: do not leak opened readers
+            self.close()
+            raise
+        logger.debug('Indexed %d members in \'%s\'.', len(self.names), self.path)
+
+    def _open(self, path, index_cache):
+        remote = self._remote
+        if remote:
+            self._archive = self._reader = open_range_reader(path)
+            path = self._reader.name or repr(path)
+        self.path = str(path)
+        self.is_dir = not remote and os.path.isdir(self.path)
+        if self.is_dir:
+            self._root = ''
+            self.names = _scan_folder(self.path)
+        elif remote or index_cache is not None:
+            if remote:
+                self._zipindex = ZipIndex.from_reader(self._archive)
+            else:
+                self._zipindex = index_cache.get(self.path)
+                self._archive = self._reader = FileRangeReader(self.path)
+            members = [name for name in self._zipindex.namelist() if not name.endswith('/')]
+            self._root = _common_root(members)
+            self.names = [name[len(self._root):] for name in members]
+        else:
+            try:
+                self._archive = zipfile.ZipFile(self.path)
+            except zipfile.BadZipfile as e:
+                raise MetaDataError(
+                    'Unable to read zip file \'{}\': {}'.format(self.path, e)) from e
+            members = [name for name in self._archive.namelist() if not name.endswith('/')]
+            self._root = _common_root(members)
+            self.names = [name[len(self._root):] for name in members]
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the zip archive or file"""
+        if self._zipfile is not None:
+            self._zipfile.close()
+            self._zipfile = None
+        if self._archive is not None:
+            if self._archive is not self._reader or self._owns_reader:
+                self._archive.close()
+            self._archive = None
+
+    def _indexed(self, member):
+        """Whether member is read through the zip index
+
+        Members the index cannot decompress are read
+        with zipfile instead, opened on first use.
+        """
+        if self._zipindex is None:
+            return False
+        if self._zipindex.supports(member):
+            return True
+        if self._zipfile is None:
+            try:
+                self._zipfile = zipfile.ZipFile(
+                    as_file(self._reader) if self._remote else self.path)
+            except zipfile.BadZipfile as e:
+                raise MetaDataError(
+                    'Unable to read zip file \'{}\': {}'.format(self.path, e)) from e
+        return False
+
+    def _zip_archive(self):
+        return self._archive if self._zipindex is None else self._zipfile
+
+    @property
+    def bytes_read(self):
+        """Bytes read from a byte-range source or indexed zip file
+
+        None if the product is read with zipfile or is a folder.
+        """
+        if self._reader is None:
+            return None
+        return self._reader.bytes_read
+
+    @property
+    def name(self):
+        """Product name (file or folder name without extension)"""
+        name = os.path.basename(os.path.normpath(self.path))
+        for ext in ['.zip', '.SAFE']:
+            if name.endswith(ext):
+                name = name[:-len(ext)]
+        return name
+
+    def member_path(self, name):
+        """Path of member in the archive or file system"""
+        if self.is_dir:
+            return os.path.join(self.path, *name.split('/'))
+        return self._root + name
+
+    def member_url(self, name):
+        """URL of member for GDAL/rasterio"""
+        if self.is_dir:
+            return self.member_path(name)
+        if _is_url(self.path):
+            return 'zip+' + self.path + '!/' + self.member_path(name)
+        return 'zip://' + self.path + '!/' + self.member_path(name)
+
+    def read(self, name):
+        """Read member contents
+
+        Returns
+        -------
+        bytes
+        """
+        if self.is_dir:
+            with open(self.member_path(name), 'rb') as f:
+                return f.read()
+        if self._archive is None:
+            raise ValueError('Product \'{}\' is closed.'.format(self.path))
+        member = self.member_path(name)
+        if self._indexed(member):
+            return self._zipindex.read(self._archive, member)
+        try:
+            return self._zip_archive().read(member)
+        except zipfile.BadZipfile as e:
+            raise MetaDataError(
+                'Unable to read zip file \'{}\': {}'.format(self.path, e)) from e
+
+    def open(self, name):
+        """Open member as binary stream
+
+        Zip members are inflated as they are read,
+        so reading only the start of a member is cheap.
+
+        Returns
+        -------
+        file-like
+        """
+        if self.is_dir:
+            return open(self.member_path(name), 'rb')
+        if self._archive is None:
+            raise ValueError('Product \'{}\' is closed.'.format(self.path))
+        member = self.member_path(name)
+        if self._indexed(member):
+            return self._zipindex.open(self._archive, member)
+        try:
+            return self._zip_archive().open(member)
+        except zipfile.BadZipfile as e:
+            raise MetaDataError(
+                'Unable to read zip file \'{}\': {}'.format(self.path, e)) from e
+
+    def filter(self, pattern):
+        """Member names matching a glob pattern (fnmatch)
+
+        Unlike on the file system, * also matches /.
+        """
+        key = ('glob', pattern)
+        if key not in self._match_cache:
+            self._match_cache[key] = fnmatch.filter(self.names, pattern)
+        return list(self._match_cache[key])
+
+    def match(self, regex):
+        """Member names matching a regular expression from the start"""
+        key = ('regex', regex)
+        if key not in self._match_cache:
+            compiled = re.compile(regex)
+            self._match_cache[key] = [
+                name for name in self.names if compiled.match(name)]
+        return list(self._match_cache[key])
+
+
+@contextlib.contextmanager
+def open_product(path, index_cache=None):
+    """Context manager for a ProductHandle from path or handle
+
+    A handle passed in is used as is and left open.
+    A path is opened (with index_cache) and closed on exit.
+    """
+    if isinstance(path, ProductHandle):
+        yield path
+        return
+    with ProductHandle(path, index_cache=index_cache) as handle:
+        yield handle
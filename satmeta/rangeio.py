@@ -0,0 +1,290 @@
+"""Byte-range sources for reading zip archives without downloading them
+
+A range reader has a `size` and a `read(offset, size)` method
+and counts the requests and bytes it transferred.
+Local files, fsspec file systems and HTTP servers
+supporting Range requests are supported.
+"""
+import io
+import os
+import re
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class RangeReader(object):
+    """Base class of byte-range sources
+
+    Subclasses implement `_read(offset, size)` and set `size`.
+
+    Attributes
+    ----------
+    name : str
+        path or URL of the source
+    size : int
+        total size in bytes
+    requests, bytes_read : int
+        number of reads and bytes transferred so far
+    """
+
+    name = None
+    size = None
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_read = 0
+        self._count_lock = threading.Lock()
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _read(self, offset, size):
+        raise NotImplementedError
+
+    def read(self, offset, size):
+        """Read size bytes starting at offset
+
+        Reads past the end are truncated.
+
+        Returns
+        -------
+        bytes
+        """
+        if offset < 0 or size < 0:
+            raise ValueError('Invalid range {}+{}.'.format(offset, size))
+        size = min(size, self.size - offset)
+        if size <= 0:
+            return b''
+        data = self._read(offset, size)
+        if len(data) != size:
+            raise IOError('Read {} of {} bytes at offset {} from \'{}\'.'.format(
+                len(data), size, offset, self.name))
+        with self._count_lock:
+            self.requests += 1
+            self.bytes_read += size
+        return data
+
+    def close(self):
+        pass
+
+
+class FileRangeReader(RangeReader):
+    """Range reader on a seekable binary file object
+
+    Parameters
+    ----------
+    fileobj : str or file-like
+        path or file opened in binary mode
+        paths are opened and closed with the reader,
+        file objects are left open
+
+    Reads are serialized with a lock
+    so the reader can be shared by threads.
+    """
+
+    def __init__(self, fileobj):
+        super(FileRangeReader, self).__init__()
+        self._owned = not hasattr(fileobj, 'seek')
+        if self._owned:
+            self.name = str(fileobj)
+            fileobj = open(self.name, 'rb')
+        else:
+            self.name = getattr(fileobj, 'name', None)
+        self._fileobj = fileobj
+        self._lock = threading.Lock()
+        self.size = fileobj.seek(0, os.SEEK_END)
+
+    def _read(self, offset, size):
+        with self._lock:
+            self._fileobj.seek(offset)
+            return self._fileobj.read(size)
+
+    def close(self):
+        if self._owned and self._fileobj is not None:
+            self._fileobj.close()
+            self._fileobj = None
+
+
+class CallableRangeReader(RangeReader):
+    """Range reader on an object with a read(offset, size) method
+
+    Parameters
+    ----------
+    source : object
+        has `read(offset, size)` returning bytes
+        and a `size` attribute or `__len__`
+    name : str, optional
+        name used in messages
+    """
+
+    def __init__(self, source, name=None):
+        super(CallableRangeReader, self).__init__()
+        self._source = source
+        self.name = name or repr(source)
+        size = getattr(source, 'size', None)
+        self.size = int(size() if callable(size) else size if size is not None else len(source))
+
+    def _read(self, offset, size):
+        return self._source.read(offset, size)
+
+
+class FSSpecRangeReader(RangeReader):
+    """Range reader on an fsspec URL using exact cat_file ranges
+
+    Requires fsspec and the protocol's implementation
+    (e.g. s3fs, gcsfs, adlfs).
+
+    Parameters
+    ----------
+    url : str
+        e.g. 's3://bucket/S2A_MSIL1C_[...].zip'
+    **storage_options
+        passed to fsspec
+    """
+
+    def __init__(self, url, **storage_options):
+        super(FSSpecRangeReader, self).__init__()
+        import fsspec.core
+        self.name = url
+        self._fs, self._path = fsspec.core.url_to_fs(url, **storage_options)
+        self.size = int(self._fs.size(self._path))
+
+    def _read(self, offset, size):
+        return self._fs.cat_file(self._path, start=offset, end=offset + size)
+
+
+class HTTPRangeReader(RangeReader):
+    """Range reader on an HTTP(S) URL using Range requests
+
+    Parameters
+    ----------
+    url : str
+        URL of the archive
+    headers : dict, optional
+        extra request headers (e.g. Authorization)
+    size : int, optional
+        size of the archive
+        default: from a HEAD request
+    timeout : float
+        request timeout in seconds
+    """
+
+    def __init__(self, url, headers=None, size=None, timeout=60):
+        super(HTTPRangeReader, self).__init__()
+        self.name = url
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.size = size if size is not None else self._head_size()
+
+    def _request(self, method='GET', headers=None):
+        import urllib.request
+        h = dict(self.headers)
+        h.update(headers or {})
+        request = urllib.request.Request(self.name, headers=h, method=method)
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _head_size(self):
+        with self._request('HEAD') as response:
+            length = response.headers.get('Content-Length')
+        if length is None:
+            raise IOError('Unable to get size of \'{}\'.'.format(self.name))
+        return int(length)
+
+    def _read(self, offset, size):
+        headers = {'Range': 'bytes={}-{}'.format(offset, offset + size - 1)}
+        with self._request(headers=headers) as response:
+            if response.status != 206:
+                raise IOError('Server does not support Range requests for \'{}\'.'.format(
+                    self.name))
+            return response.read()
+
+
+class _RangeFile(io.RawIOBase):
+    """Seekable raw file reading from a RangeReader"""
+
+    def __init__(self, reader):
+        self._reader = reader
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._reader.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, b):
+        data = self._reader.read(self._pos, len(b))
+        n = len(data)
+        b[:n] = data
+        self._pos += n
+        return n
+
+
+def as_file(reader, buffer_size=65536):
+    """Seekable binary file on a RangeReader (e.g. for zipfile.ZipFile)
+
+    Closing the file does not close the reader.
+    """
+    return io.BufferedReader(_RangeFile(reader), buffer_size=buffer_size)
+
+
+def _is_url(path):
+    return isinstance(path, str) and re.match(r'^[a-zA-Z][\w+.-]+://', path) is not None
+
+
+def is_range_source(source):
+    """Whether source is read by byte ranges instead of as local path
+
+    True for URLs and anything that is not a str or Path.
+    """
+    return _is_url(source) or not isinstance(source, (str, os.PathLike))
+
+
+def open_range_reader(source, **kwargs):
+    """Get a RangeReader for a path, URL or byte-range source
+
+    Parameters
+    ----------
+    source : str or file-like or object or RangeReader
+        http(s) URL: HTTPRangeReader
+        other URL (e.g. s3://): FSSpecRangeReader
+        path or seekable file: FileRangeReader
+        object with read(offset, size): CallableRangeReader
+        RangeReader: returned as is
+    **kwargs
+        passed to the reader class
+
+    Returns
+    -------
+    RangeReader
+    """
+    if isinstance(source, RangeReader):
+        return source
+    if _is_url(source):
+        if source.startswith(('http://', 'https://')):
+            return HTTPRangeReader(source, **kwargs)
+        return FSSpecRangeReader(source, **kwargs)
+    if isinstance(source, (str, os.PathLike)) or hasattr(source, 'seek'):
+        return FileRangeReader(source, **kwargs)
+    if hasattr(source, 'read'):
+        return CallableRangeReader(source, **kwargs)
+    raise ValueError('Unable to read byte ranges from {!r}.'.format(source))
@@ -0,0 +1,310 @@
+"""Compact record types for parsed meta data
+
+Records keep their fields in __slots__ instead of a per-instance dict,
+store repeated strings interned and per-resolution or per-band values
+as flat tuples. They are read-only mappings giving the same values
+as the dicts returned by the parsers, so existing code indexing
+meta data by key keeps working. Use to_dict() to get the plain dict.
+"""
+import sys
+from collections.abc import Mapping
+
+from satmeta import converters
+from satmeta.s2 import utils as s2utils
+
+
+def _intern(s):
+    """Share one instance of repeated strings across records"""
+    return None if s is None else sys.intern(s)
+
+
+class Record(Mapping):
+    """Base class for compact meta data records
+
+    Subclasses declare
+
+    _fields : tuple of str
+        stored fields, also used as __slots__
+    _keys : tuple of str
+        mapping keys in the order of the parser dicts
+        keys that are not stored fields are properties
+    _to_storage : dict
+        key -> function converting a parsed value to its stored form
+    _from_storage : dict
+        key -> function converting a stored value back to its parsed form
+    _optional : tuple of str
+        keys left out of the mapping when their value is None
+
+    Parameters
+    ----------
+    extra : dict, optional
+        parsed fields that are not declared by the record type
+    **fields
+        values of stored fields in their parsed form
+    """
+
+    __slots__ = ('extra',)
+    _fields = ()
+    _keys = ()
+    _to_storage = {}
+    _from_storage = {}
+    _optional = ()
+
+    def __init__(self, extra=None, **fields):
+        unknown = set(fields).difference(self._fields)
+        if unknown:
+            raise TypeError('Unknown fields for {}: {}.'.format(
+                type(self).__name__, ', '.join(sorted(unknown))))
+        for name in self._fields:
+            value = fields.get(name)
+            if value is not None and name in self._to_storage:
+                value = self._to_storage[name](value)
+            setattr(self, name, value)
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, metadata):
+        """Create record from meta data dict returned by a parser"""
+        fields = {}
+        extra = {}
+        for key in metadata:
+            if key in cls._fields:
+                fields[key] = metadata[key]
+            elif key not in cls._keys:
+                extra[key] = metadata[key]
+        return cls(extra=extra, **fields)
+
+    def _has_key(self, key):
+        return key in self._keys and not (
+            key in self._optional and getattr(self, key) is None)
+
+    def __getitem__(self, key):
+        if self._has_key(key):
+            value = getattr(self, key)
+            if value is not None and key in self._from_storage:
+                value = self._from_storage[key](value)
+            return value
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for key in self._keys:
+            if self._has_key(key):
+                yield key
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(name, getattr(self, name)) for name in self._fields))
+
+    def to_dict(self):
+        """Get meta data as a plain dict like the parsers return it"""
+        return {key: self[key] for key in self}
+
+
+class S1Metadata(Record):
+    """Sentinel-1 meta data record
+
+    See s1.meta.find_parse_metadata
+    """
+
+    __slots__ = _fields = (
+        'title', 'footprint', 'sensing_start', 'sensing_end', 'product_type',
+        'polarizations', 'passdir', 'sensor_operational_mode',
+        'relative_orbit_number', 'spacecraft', 'annotations')
+    _keys = _fields[:-1] + ('sensing_time', 'annotations')
+    _to_storage = {
+        'product_type': _intern,
+        'polarizations': lambda values: tuple(_intern(v) for v in values),
+        'passdir': _intern,
+        'sensor_operational_mode': _intern,
+        'spacecraft': _intern}
+    _from_storage = {'polarizations': list}
+    _optional = ('annotations',)
+
+    @property
+    def sensing_time(self):
+        return self.sensing_start
+
+
+class S2GranuleMetadata(Record):
+    """Sentinel-2 granule meta data record
+
+    The per-resolution image size and position are stored
+    as tuples aligned with `resolutions`. Transforms, shapes,
+    bounds and crs are derived from them on access.
+
+    See s2.meta.parse_granule_metadata
+    """
+
+    __slots__ = _fields = (
+        'tile_ID', 'sun_zenith', 'sun_azimuth', 'sensor_zenith', 'sensor_azimuth',
+        'projection', 'cloud_cover_percentage', 'tile_name',
+        'resolutions', 'nrows', 'ncols', 'ulx', 'uly')
+    _keys = (
+        'tile_ID', 'sun_zenith', 'sun_azimuth', 'sensor_zenith', 'sensor_azimuth',
+        'projection', 'cloud_cover_percentage', 'image_size', 'image_geoposition',
+        'tile_name', 'image_transform', 'image_shape', 'image_bounds', 'crs')
+    _to_storage = {
+        'sensor_zenith': tuple,
+        'sensor_azimuth': tuple,
+        'projection': _intern,
+        'resolutions': lambda values: _intern_resolutions(tuple(values)),
+        'nrows': tuple,
+        'ncols': tuple,
+        'ulx': tuple,
+        'uly': tuple}
+    _from_storage = {
+        'sensor_zenith': list,
+        'sensor_azimuth': list}
+
+    @classmethod
+    def from_dict(cls, metadata):
+        """Create record from meta data dict returned by a parser
+
+        Derived fields are not accessed so that
+        LazyMetadata does not compute them
+        """
+        fields = {key: metadata[key] for key in cls._fields if key in metadata}
+        image_size = metadata['image_size']
+        image_geoposition = metadata['image_geoposition']
+        resolutions = list(image_size)
+        fields.update(
+            resolutions=resolutions,
+            nrows=[image_size[res]['NROWS'] for res in resolutions],
+            ncols=[image_size[res]['NCOLS'] for res in resolutions],
+            ulx=[image_geoposition[res]['ULX'] for res in resolutions],
+            uly=[image_geoposition[res]['ULY'] for res in resolutions])
+        return cls(**fields)
+
+    @property
+    def image_size(self):
+        return {
+            res: {'NROWS': nrows, 'NCOLS': ncols}
+            for res, nrows, ncols in zip(self.resolutions, self.nrows, self.ncols)}
+
+    @property
+    def image_geoposition(self):
+        return {
+            res: {'ULX': ulx, 'ULY': uly}
+            for res, ulx, uly in zip(self.resolutions, self.ulx, self.uly)}
+
+    @property
+    def image_transform(self):
+        return {
+            res: s2utils.kw_to_affine(ULX=ulx, ULY=uly, COL_STEP=res, ROW_STEP=res)
+            for res, ulx, uly in zip(self.resolutions, self.ulx, self.uly)}
+
+    @property
+    def image_shape(self):
+        return {
+            res: [nrows, ncols]
+            for res, nrows, ncols in zip(self.resolutions, self.nrows, self.ncols)}
+
+    @property
+    def image_bounds(self):
+        shapes = self.image_shape
+        return {
+            res: converters.trans_shape_to_bounds(transform, shapes[res])
+            for res, transform in self.image_transform.items()}
+
+    @property
+    def crs(self):
+        return {'init': self.projection}
+
+
+_resolutions_cache = {}
+
+
+def _intern_resolutions(resolutions):
+    return _resolutions_cache.setdefault(resolutions, resolutions)
+
+
+class L8Metadata(Record):
+    """Landsat 8 meta data record
+
+    Fields not listed here (they vary between MTL versions)
+    are kept in `extra`.
+
+    See l8.meta.find_parse_metadata
+    """
+
+    __slots__ = _fields = (
+        'rescaling', 'scene_id', 'product_id', 'spacecraft_id', 'sensor_id',
+        'nadir_offnadir', 'path', 'row', 'cloud_cover', 'cloud_cover_land',
+        'sun_azimuth', 'sun_elevation', 'earth_sun_distance', 'roll_angle',
+        'utm_zone', 'reflective_lines', 'reflective_samples', 'panchromatic_lines',
+        'panchromatic_samples', 'image_quality_oli', 'image_quality_tirs',
+        'sensing_time', 'spacecraft', 'footprint', 'footprint_projected')
+    _keys = _fields[:-2] + ('title', 'footprint', 'footprint_projected')
+    _to_storage = {
+        'spacecraft_id': _intern,
+        'sensor_id': _intern,
+        'nadir_offnadir': _intern,
+        'spacecraft': _intern}
+
+    @property
+    def title(self):
+        return self.product_id
+
+
+class DGMetadata(Record):
+    """DigitalGlobe meta data record
+
+    Top-level IMD fields not listed here are kept in `extra`.
+
+    See dg.meta.parse_metadata
+    """
+
+    __slots__ = _fields = (
+        'band_meta', 'image_meta', 'projection_meta', 'angles', 'sensing_time',
+        'calibration', 'spacecraft', 'title', 'footprint', 'transform',
+        'footprint_projected')
+    _keys = (
+        'band_meta', 'image_meta', 'projection_meta', 'satId', 'CatId', 'angles',
+        'sensing_time', 'calibration', 'spacecraft', 'title', 'footprint',
+        'transform', 'footprint_projected')
+    _to_storage = {'spacecraft': _intern}
+
+    @property
+    def satId(self):
+        return self.spacecraft
+
+    @property
+    def CatId(self):
+        return self.title
+
+
+class DimapMetadata(Record):
+    """Pleiades and Pleiades Neo (DIMAP V2) meta data record
+
+    Angles are stored as a tuple in the order of `angle_keys`.
+    Calibration values are derived from calibration and band order.
+
+    See pleiades.meta.find_parse_metadata and pneo.meta.find_parse_metadata
+    """
+
+    angle_keys = ('sun_azimuth', 'sun_elevation', 'sensor_azimuth', 'sensor_zenith')
+
+    __slots__ = _fields = (
+        'angles', 'spacecraft', 'sensing_time', 'footprint', 'calibration',
+        'band_order', 'ntiles', 'title', 'height', 'width', 'count')
+    _keys = _fields[:6] + ('calibration_values',) + _fields[6:]
+    _to_storage = {
+        'angles': lambda angles: tuple(angles[key] for key in DimapMetadata.angle_keys),
+        'spacecraft': _intern,
+        'band_order': lambda bands: tuple(_intern(b) for b in bands)}
+    _from_storage = {
+        'angles': lambda values: dict(zip(DimapMetadata.angle_keys, values)),
+        'band_order': list}
+
+    @property
+    def calibration_values(self):
+        return {
+            key: [self.calibration[band][key] for band in self.band_order]
+            for key in ['gain', 'bias']}
@@ -1,12 +1,15 @@
 import re
 import os.path
-import functools
 import datetime
 import logging
 import warnings
 
 from . import metafile
 from .. import converters
+from ..schema import Field, Schema
+from ..records import S1Metadata
+from ..product import ProductHandle, open_product
+from ..rangeio import is_range_source
 
 logger = logging.getLogger(__name__)
 
@@ -40,9 +43,27 @@ def get_product_date(fname):
     return dates_from_fname(fname)[0].date()
 
 
-def _get_relative_orbit_number(root):
-    start = int(converters.get_single(root, 'safe:relativeOrbitNumber[@type=\'start\']'))
-    stop = int(converters.get_single(root, 'safe:relativeOrbitNumber[@type=\'stop\']'))
+MANIFEST_SCHEMA = Schema({
+    'title': Field('safe:resource', 'name', index=0),
+    'footprint': Field('gml:coordinates', to_type=converters.parse_coords_yx),
+    'relative_orbit_number_start': Field(
+        'safe:relativeOrbitNumber[@type=\'start\']', to_type=int),
+    'relative_orbit_number_stop': Field(
+        'safe:relativeOrbitNumber[@type=\'stop\']', to_type=int),
+    'sensing_start': Field('safe:startTime', to_type=converters.parse_datetime),
+    'sensing_end': Field('safe:stopTime', to_type=converters.parse_datetime),
+    'product_type': Field('s1sarl1:productType'),
+    'polarizations': Field('s1sarl1:transmitterReceiverPolarisation', many=True),
+    'passdir': Field('s1:pass'),
+    'sensor_operational_mode': Field('s1sarl1:mode')})
+
+ANNOTATIONS_SCHEMA = Schema({
+    'incidence_angle_mid_swath': Field('incidenceAngleMidSwath')})
+
+
+def _get_relative_orbit_number(metadata):
+    start = metadata.pop('relative_orbit_number_start')
+    stop = metadata.pop('relative_orbit_number_stop')
     if start != stop:
         warnings.warn(
                 'relativeOrbitNumber range from %s to %s. Only returning %s', start, stop, start)
@@ -51,18 +72,14 @@ def _get_relative_orbit_number(root):
 
 def parse_metadata(metadatafile=None, metadatastr=None):
     root = converters.get_root(metadatafile, metadatastr)
-    _get_single = functools.partial(converters.get_single, root)
+    extracted = MANIFEST_SCHEMA.extract(root)
+    relative_orbit_number = _get_relative_orbit_number(extracted)
+    # keep the key order of the manifest dict
     metadata = {
-        'title': converters.get_instance(root, 'safe:resource', 'name', index=0),
-        'footprint': converters.get_single_polygon_yx(root, 'gml:coordinates'),
-        'relative_orbit_number': _get_relative_orbit_number(root),
-        'sensing_start': converters.get_single_date(root, 'safe:startTime'),
-        'sensing_end': converters.get_single_date(root, 'safe:stopTime'),
-        'product_type': _get_single('s1sarl1:productType'),
-        'polarizations': converters.get_all(root, 's1sarl1:transmitterReceiverPolarisation'),
-        'passdir': _get_single('s1:pass'),
-        'sensor_operational_mode': _get_single('s1sarl1:mode')
-    }
+        'title': extracted.pop('title'),
+        'footprint': extracted.pop('footprint'),
+        'relative_orbit_number': relative_orbit_number}
+    metadata.update(extracted)
     metadata['spacecraft'] = get_spacecraft_name(metadata['title'])
     metadata['sensing_time'] = metadata['sensing_start']
     return metadata
@@ -70,34 +87,31 @@ def parse_metadata(metadatafile=None, metadatastr=None):
 
 def parse_annotations(annotationsfile=None, annotationsstr=None):
     root = converters.get_root(annotationsfile, annotationsstr)
-    _get_single = functools.partial(converters.get_single, root)
-    annotations = {
-        'incidence_angle_mid_swath': _get_single('incidenceAngleMidSwath')
-    }
-    return annotations
-
-
-def find_parse_metadata(infile, annotations=False):
-    """Find and parse manifest in SAFE or zip file"""
-    # handle pathlib.Path
-    astrdict = None
-    infile = str(infile)
-    if infile.endswith('.SAFE'):
-        mstr = metafile.read_manifest_SAFE(infile)
+    return ANNOTATIONS_SCHEMA.extract(root)
+
+
+def find_parse_metadata(infile, annotations=False, record=False, index_cache=None):
+    """Find and parse manifest in SAFE or zip file
+
+    infile can be a path or a satmeta.product.ProductHandle
+    or a URL or byte-range source (see satmeta.rangeio)
+    index_cache is passed to ProductHandle
+    With record, return compact records.S1Metadata
+    """
+    if not isinstance(infile, ProductHandle) and not is_range_source(infile):
+        # handle pathlib.Path
+        infile = str(infile)
+        if not infile.endswith(('.SAFE', '.zip')):
+            raise ValueError(
+                'Input file/folder must end in .zip or .SAFE. '
+                'Got \'{}\'.'.format(infile)
+            )
+    with open_product(infile, index_cache=index_cache) as handle:
+        data = parse_metadata(metadatastr=metafile.read_manifest_handle(handle))
         if annotations:
-            astrdict = metafile.read_annotations_SAFE(infile)
-    elif infile.endswith('.zip'):
-        mstr = metafile.read_manifest_ZIP(infile)
-        if annotations:
-            astrdict = metafile.read_annotations_ZIP(infile)
-    else:
-        raise ValueError(
-            'Input file/folder must end in .zip or .SAFE. '
-            'Got \'{}\'.'.format(infile)
-        )
-    data = parse_metadata(metadatastr=mstr)
-    if astrdict is not None:
-        data['annotations'] = {}
-        for key, astr in astrdict.items():
-            data['annotations'][key] = parse_annotations(annotationsstr=astr)
+            data['annotations'] = {
+                key: parse_annotations(annotationsstr=astr)
+                for key, astr in metafile.read_annotations_handle(handle).items()}
+    if record:
+        return S1Metadata.from_dict(data)
     return data
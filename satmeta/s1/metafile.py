@@ -7,6 +7,8 @@ import fnmatch
 import logging
 
 from ..exceptions import MetaDataError
+from ..product import ProductHandle
+from ..rangeio import is_range_source
 
 logger = logging.getLogger(__name__)
 
@@ -26,33 +28,49 @@ def find_manifest_in_SAFE(path):
 def read_manifest_SAFE(path):
     """Find and read manifest file in SAFE folder"""
     manifest = find_manifest_in_SAFE(path)
-    with open(manifest) as f:
+    with open(manifest, 'rb') as f:
         return f.read()
 
 
-def read_manifest_ZIP(path):
+def read_manifest_ZIP(path, index_cache=None):
     """Find and read manifest file in zip file
 
     Parameters
     ----------
-    path : str
-        path to zip file
+    path : str or rangeio.RangeReader
+        path to zip file, URL or byte-range source
+        (read via ProductHandle, see rangeio.open_range_reader)
+    index_cache : zipindex.ZipIndexCache, optional
+        read the member index from this cache
+        and seek directly to the manifest
 
     Returns
     -------
-    str
-        metadata as string
+    bytes
+        manifest file contents
     """
+    if index_cache is not None or is_range_source(path):
+        with ProductHandle(path, index_cache=index_cache) as handle:
+            return read_manifest_handle(handle)
     try:
         with zipfile.ZipFile(path) as zf:
             name = list(fnmatch.filter(zf.namelist(), '*/manifest.safe'))[0]
-            return zf.open(name).read()
+            return zf.read(name)
     except zipfile.BadZipfile as e:
         raise MetaDataError(
             'Unable to read zip file \'{}\': {}'.format(path, str(e))
         ) from e
 
 
+def read_manifest_handle(handle):
+    """Read manifest file in ProductHandle"""
+    try:
+        name = handle.filter('manifest.safe')[0]
+    except IndexError:
+        raise ValueError('No manifest file found in \'{}\'.'.format(handle.path))
+    return handle.read(name)
+
+
 def _get_swath_polarisation(name):
     try:
         swath, polarisation = re.match(r's1[a-z]-(iw\d?)-.*-(v[vh]).*\.xml', name).groups()
@@ -64,19 +82,26 @@ def _get_swath_polarisation(name):
     )
 
 
-def read_annotations_ZIP(path):
+def read_annotations_ZIP(path, index_cache=None):
     """Find and read annotation files in zip file
 
     Parameters
     ----------
-    path : str
-        path to zip file
+    path : str or rangeio.RangeReader
+        path to zip file, URL or byte-range source
+        (read via ProductHandle, see rangeio.open_range_reader)
+    index_cache : zipindex.ZipIndexCache, optional
+        read the member index from this cache
+        and seek directly to the annotation files
 
     Returns
     -------
-    str
-        metadata as string
+    dict
+        polarisation_swath -> annotation file contents (bytes)
     """
+    if index_cache is not None or is_range_source(path):
+        with ProductHandle(path, index_cache=index_cache) as handle:
+            return read_annotations_handle(handle)
     annotations = {}
     try:
         with zipfile.ZipFile(path) as zf:
@@ -89,8 +114,7 @@ def read_annotations_ZIP(path):
                 key = '{polarisation}_{swath}'.format(
                     **_get_swath_polarisation(posixpath.basename(name))
                 )
-                data = zf.open(name).read()
-                annotations[key] = data
+                annotations[key] = zf.read(name)
     except zipfile.BadZipfile as e:
         raise MetaDataError(
             'Unable to read zip file \'{}\': {}'.format(path, str(e))
@@ -98,8 +122,8 @@ def read_annotations_ZIP(path):
     return annotations
 
 
-def read_annotations_SAFE(path):
-    """Find and read annotation files in SAFE file
+def find_annotations_in_SAFE(path):
+    """Find annotation files in SAFE file
 
     Parameters
     ----------
@@ -108,8 +132,8 @@ def read_annotations_SAFE(path):
 
     Returns
     -------
-    str
-        metadata as string
+    dict
+        polarisation_swath -> path to annotation file
     """
     pattern = os.path.join(
         path, 'annotation', 's1?-iw*-*.xml'
@@ -122,7 +146,51 @@ def read_annotations_SAFE(path):
         key = '{polarisation}_{swath}'.format(
             **_get_swath_polarisation(os.path.basename(path))
         )
-        with open(path) as f:
-            data = f.read()
-        annotations[key] = data
+        annotations[key] = path
+    return annotations
+
+
+def read_annotations_SAFE(path):
+    """Find and read annotation files in SAFE file
+
+    Parameters
+    ----------
+    path : str
+        path to SAFE file
+
+    Returns
+    -------
+    dict
+        polarisation_swath -> annotation file contents (bytes)
+    """
+    annotations = {}
+    for key, fn in find_annotations_in_SAFE(path).items():
+        with open(fn, 'rb') as f:
+            annotations[key] = f.read()
+    return annotations
+
+
+def read_annotations_handle(handle):
+    """Find and read annotation files in ProductHandle
+
+    Parameters
+    ----------
+    handle : ProductHandle
+        opened product
+
+    Returns
+    -------
+    dict
+        polarisation_swath -> annotation file contents (bytes)
+    """
+    pattern = 'annotation/s1?-iw*-*.xml'
+    found = handle.filter(pattern)
+    if not found:
+        raise ValueError(f'No annotations found with pattern "{pattern}" in "{handle.path}".')
+    annotations = {}
+    for name in found:
+        key = '{polarisation}_{swath}'.format(
+            **_get_swath_polarisation(posixpath.basename(name))
+        )
+        annotations[key] = handle.read(name)
     return annotations
@@ -1,5 +1,7 @@
 from __future__ import division
 import posixpath
+import functools
+import concurrent.futures
 from collections import defaultdict
 
 import numpy as np
@@ -49,9 +51,73 @@ def _get_values(root, group):
     return values2d
 
 
+def _stack_detector_grids(elements, child, nsmap):
+    """Read VALUES of detector grids into one array
+
+    Parameters
+    ----------
+    elements : list of lxml elements
+        Viewing_Incidence_Angles_Grids elements
+    child : str
+        angle direction tag, e.g. 'Zenith'
+    nsmap : dict
+        namespace map of the document
+
+    Returns
+    -------
+    ndarray (detector, rows, cols) float32
+    """
+    values_path = posixpath.join(child, 'Values_List/VALUES')
+    texts = []
+    nrows = None
+    for e in elements:
+        rows = [v.text for v in e.iterfind(values_path, namespaces=nsmap)]
+        if nrows is None:
+            nrows = len(rows)
+        elif len(rows) != nrows:
+            raise ValueError('Detector grids have different shapes.')
+        texts += rows
+    values = np.fromstring(' '.join(texts), dtype='f4', sep=' ')
+    ncols = len(texts[0].split())
+    if values.size != len(elements) * nrows * ncols:
+        raise ValueError('Detector grids have different shapes.')
+    return values.reshape(len(elements), nrows, ncols)
+
+
+def _last_finite_index(stack):
+    """Index of the last detector with a finite value per pixel"""
+    return len(stack) - 1 - np.argmax(np.isfinite(stack)[::-1], axis=0)
+
+
+def _merge_detectors(stack, index=None):
+    """Merge detector grids so that the last finite value wins
+
+    Parameters
+    ----------
+    stack : ndarray (detector, rows, cols)
+        grids in document order
+    index : ndarray (rows, cols), optional
+        precomputed _last_finite_index
+
+    Returns
+    -------
+    ndarray (rows, cols)
+        NaN where no detector has a finite value
+    """
+    if index is None:
+        index = _last_finite_index(stack)
+    merged = np.take_along_axis(stack, index[np.newaxis], axis=0)[0]
+    merged[~np.isfinite(merged)] = np.nan
+    return merged
+
+
 def _get_values_merged_detectors(root, group):
     """Get VALUES from Viewing_Incidence grids and merge them
 
+    All detector grids are read in one pass
+    into a (detector, rows, cols) stack
+    and merged with a single reduction.
+
     Parameters
     ----------
     root : lxml XML root
@@ -61,24 +127,10 @@ def _get_values_merged_detectors(root, group):
         see `_generate_group_name`
     """
     pargroup, child = posixpath.split(group)
-    ee = root.findall('.//' + pargroup)
-
-    pargroup_detector = pargroup + '[@detectorId="{detectorId}"]'
-    pargroup_detector_fmt = posixpath.join(pargroup_detector, child)
-
-    aa = []
-    for e in ee:
-        group_detector = pargroup_detector_fmt.format(**e.attrib)
-        a = _get_values(root, group_detector)
-        aa.append(a)
-
-    a_merged = np.empty_like(aa[0])
-    a_merged[:] = np.nan
-    for a in aa:
-        mask = np.isfinite(a)
-        a_merged[mask] = a[mask]
-
-    return a_merged
+    ee = converters.get_elements(root, pargroup)
+    if not ee:
+        raise ValueError('No detector grids found for \'{}\'.'.format(group))
+    return _merge_detectors(_stack_detector_grids(ee, child, root.nsmap))
 
 
 def _get_angles_any_type(root, group):
@@ -126,24 +178,142 @@ def _get_angles_with_gref(root, group, meta=None):
     return angles_raw, src_transform, src_crs
 
 
-def _extrapolate_nan(a_raw):
-    """Fill NaN with bivariate splite fit"""
-    import scipy.interpolate
-    good = np.isfinite(a_raw)
-    if np.all(good):
-        return a_raw
-    x, y = np.where(good)
-    f = scipy.interpolate.Rbf(x, y, a_raw[good])
-    xbad, ybad = np.where(~good)
-    a_raw_filled = a_raw.copy()
-    a_raw_filled[~good] = f(xbad, ybad)
-    return a_raw_filled
+EXTRAPOLATE_METHODS = ['rbf', 'nearest', 'plane', 'poly']
+
+
+def _rbf_weights(good, bad):
+    """Weights of scipy.interpolate.Rbf (multiquadric) from good to bad nodes"""
+    import scipy.linalg
+    # same defaults as scipy.interpolate.Rbf
+    edges = np.ptp(good, axis=0)
+    edges = edges[np.nonzero(edges)]
+    epsilon = np.power(np.prod(edges) / len(good), 1.0 / edges.size)
+
+    def _phi(a, b):
+        r = np.hypot(*(a[:, np.newaxis, :] - b[np.newaxis, :, :]).T).T
+        return np.sqrt((r / epsilon) ** 2 + 1)
+
+    # A is symmetric, so W = phi_bad A^-1 = solve(A, phi_bad.T).T
+    return scipy.linalg.solve(
+        _phi(good, good), _phi(bad, good).T, assume_a='sym').T
+
+
+def _nearest_weights(good, bad):
+    """Select the value of the closest good node"""
+    d2 = ((bad[:, np.newaxis, :] - good[np.newaxis, :, :]) ** 2).sum(axis=-1)
+    weights = np.zeros(d2.shape)
+    weights[np.arange(len(bad)), np.argmin(d2, axis=1)] = 1
+    return weights
+
+
+def _polynomial_weights(good, bad, order):
+    """Least-squares polynomial surface of order in row and col"""
+    scale = max(good.max(), bad.max(), 1)
+
+    def _design(nodes):
+        r, c = (nodes / scale).T
+        terms = [np.ones_like(r)]
+        for n in range(1, order + 1):
+            terms += [r ** (n - k) * c ** k for k in range(n + 1)]
+        return np.stack(terms, axis=-1)
+
+    return _design(bad).dot(np.linalg.pinv(_design(good)))
+
+
+_weight_funcs = {
+    'rbf': _rbf_weights,
+    'nearest': _nearest_weights,
+    'plane': functools.partial(_polynomial_weights, order=1),
+    'poly': functools.partial(_polynomial_weights, order=2)}
+
+
+@functools.lru_cache(maxsize=128)
+def _fill_weights(method, shape, packed_mask):
+    """Linear map from the good to the NaN nodes of a grid (cached)
+
+    All methods are linear in the grid values, so the map only
+    depends on which nodes are valid. Grids sharing the same
+    mask (zenith and azimuth, most bands) share one solve.
+
+    Parameters
+    ----------
+    method : str
+        one of EXTRAPOLATE_METHODS
+    shape : tuple
+        grid shape
+    packed_mask : bytes
+        np.packbits of the flat mask of finite nodes
+
+    Returns
+    -------
+    good, bad : ndarray (n,)
+        flat indices of good and bad nodes
+    weights : ndarray (nbad, ngood)
+    """
+    size = int(np.prod(shape))
+    mask = np.unpackbits(
+        np.frombuffer(packed_mask, np.uint8), count=size).astype(bool)
+    good, = np.nonzero(mask)
+    bad, = np.nonzero(~mask)
+    coords = np.stack(np.unravel_index(np.arange(size), shape), axis=-1).astype('f8')
+    weights = _weight_funcs[method](coords[good], coords[bad])
+    for a in (good, bad, weights):
+        a.flags.writeable = False
+    return good, bad, weights
+
+
+def extrapolate_nan(grids, method='rbf'):
+    """Fill NaN in angle grids by extrapolating the valid nodes
+
+    Parameters
+    ----------
+    grids : ndarray (..., rows, cols)
+        one or more angle grids
+        e.g. the cube from parse_angles_cube
+    method : str
+        one of EXTRAPOLATE_METHODS
+        rbf : multiquadric radial basis functions
+            same as scipy.interpolate.Rbf
+        nearest : value of the closest valid node
+        plane : least-squares plane
+        poly : least-squares quadratic surface
+
+    Returns
+    -------
+    ndarray
+        same shape and dtype as grids
+        grids without valid nodes are left as NaN
+    """
+    if method not in _weight_funcs:
+        raise ValueError('method must be one of {}.'.format(EXTRAPOLATE_METHODS))
+    grids = np.asarray(grids)
+    shape = grids.shape[-2:]
+    flat = grids.reshape(-1, shape[0] * shape[1])
+    good = np.isfinite(flat)
+    todo = good.any(axis=1) & ~good.all(axis=1)
+    if not todo.any():
+        return grids
+    filled = flat.copy()
+    masks, inverse = np.unique(good[todo], axis=0, return_inverse=True)
+    rows = np.nonzero(todo)[0]
+    for i, mask in enumerate(masks):
+        igood, ibad, weights = _fill_weights(method, shape, np.packbits(mask).tobytes())
+        sel = rows[inverse.ravel() == i]
+        filled[np.ix_(sel, ibad)] = flat[np.ix_(sel, igood)].dot(weights.T)
+    return filled.reshape(grids.shape)
+
+
+def _extrapolate_nan(a_raw, method=True):
+    """Fill NaN with extrapolate_nan (True: 'rbf')"""
+    if method is True:
+        method = 'rbf'
+    return extrapolate_nan(a_raw, method=method)
 
 
 def _get_resample_angles_rasterio(
         root, group, dst_res=None, dst_transform=None,
         dst_crs=None, dst_shape=None, extrapolate=True,
-        resampling=None, meta=None
+        resampling=None, meta=None, dtype='f8', out=None
 ):
     """Parse angles and resample to dst_res
 
@@ -161,8 +331,10 @@ def _get_resample_angles_rasterio(
         destination CRS
     dst_shape : tuple, optional
         destinatinon shape
-    extrapolate : bool
+    extrapolate : bool or str
         extrapolate to fill NaN areas
+        True or one of EXTRAPOLATE_METHODS
+        True uses 'rbf'
     resampling : int, optional
         resampling method
         see rasterio.warp.Resampling
@@ -170,6 +342,11 @@ def _get_resample_angles_rasterio(
     meta : dict, optional
         granule metadata
         to avoid parsing twice
+    dtype : str or numpy.dtype
+        output data type
+    out : ndarray, optional
+        array to write the output to
+        see utils.resample
     """
     import rasterio.crs
     import rasterio.warp
@@ -206,7 +383,7 @@ def _get_resample_angles_rasterio(
         dst_transform = src_transform
 
     if extrapolate:
-        angles_raw = _extrapolate_nan(angles_raw)
+        angles_raw = _extrapolate_nan(angles_raw, extrapolate)
     return utils.resample(
         angles_raw,
         src_transform=src_transform,
@@ -216,7 +393,9 @@ def _get_resample_angles_rasterio(
         dst_shape=dst_shape,
         resampling=resampling,
         src_nodata=np.nan,
-        dst_nodata=np.nan
+        dst_nodata=np.nan,
+        dtype=dtype,
+        out=out
     )
 
 
@@ -235,16 +414,66 @@ def _get_resample_angles_imresize(
         destination shape
     interp : str
         interpolation method
-    extrapolate : bool
+    extrapolate : bool or str
         extrapolate to fill NaN areas
+        True or one of EXTRAPOLATE_METHODS
+        True uses 'rbf'
     """
     from scipy.misc import imresize
     angles_raw = _get_angles_any_type(root, group)
     if extrapolate:
-        angles_raw = _extrapolate_nan(angles_raw)
+        angles_raw = _extrapolate_nan(angles_raw, extrapolate)
     return imresize(angles_raw, dst_shape, interp=interp, mode='F')
 
 
+def _get_resample_angles_separable(
+        root, group, dst_shape, dst_transform=None, interp='bilinear',
+        extrapolate=True, meta=None, dtype='f4', out=None
+):
+    """Parse angles and resample with separable interpolation
+
+    Same-CRS alternative to the rasterio method
+    without the rasterio dependency. Output is float32 by default.
+
+    Parameters
+    ----------
+    root : lxml root
+        root of granule metadata XML doc
+    group : str
+        path to angles tag
+    dst_shape : tuple
+        destination shape
+    dst_transform : Affine, optional
+        transform to resample to
+        default: angle grid extent divided into dst_shape
+    interp : str in ['nearest', 'bilinear', 'bicubic']
+        interpolation method
+    extrapolate : bool or str
+        extrapolate to fill NaN areas
+        True or one of EXTRAPOLATE_METHODS
+        True uses 'rbf'
+    meta : dict, optional
+        granule metadata
+        to avoid parsing twice
+    dtype : str or numpy.dtype
+        output data type
+    out : ndarray, optional
+        array to write the output to
+        see utils.resample_separable
+    """
+    angles_raw, src_transform, _ = _get_angles_with_gref(root, group, meta=meta)
+    if extrapolate:
+        angles_raw = _extrapolate_nan(angles_raw, extrapolate)
+    return utils.resample_separable(
+        angles_raw,
+        src_transform=src_transform,
+        dst_shape=dst_shape,
+        dst_transform=dst_transform,
+        interp=interp,
+        dtype=dtype,
+        out=out)
+
+
 def _get_resample_angles_zoom(
         root, group, dst_shape=None, zoom=None, order=3, extrapolate=True
 ):
@@ -262,18 +491,50 @@ def _get_resample_angles_zoom(
         used instead of dst_shape
     order : int
         spline interpolation order
-    extrapolate : bool
+    extrapolate : bool or str
         extrapolate to fill NaN areas
+        True or one of EXTRAPOLATE_METHODS
+        True uses 'rbf'
     """
     import scipy.ndimage
     angles_raw = _get_angles_any_type(root, group)
     if extrapolate:
-        angles_raw = _extrapolate_nan(angles_raw)
+        angles_raw = _extrapolate_nan(angles_raw, extrapolate)
     if zoom is None:
         zoom = np.array(dst_shape) / np.array(angles_raw.shape)
     return scipy.ndimage.zoom(angles_raw, zoom=zoom, order=order, cval=np.nan)
 
 
+# output dtype of the resample methods that support out
+_default_dtypes = {'rasterio': 'f8', 'separable': 'f4'}
+
+
+def _window_tuple(window):
+    """(row_off, col_off, nrows, ncols) from tuple or rasterio Window"""
+    if hasattr(window, 'row_off'):
+        return (
+            int(window.row_off), int(window.col_off),
+            int(window.height), int(window.width))
+    return tuple(int(v) for v in window)
+
+
+def _window_transform_shape(window, transform):
+    """Transform and shape of window in grid with transform"""
+    row_off, col_off, nrows, ncols = _window_tuple(window)
+    return transform * transform.translation(col_off, row_off), (nrows, ncols)
+
+
+def _iter_windows(shape, block_shape):
+    """Windows (row_off, col_off, nrows, ncols) covering shape in blocks"""
+    nrows, ncols = shape
+    brows, bcols = block_shape
+    for row_off in range(0, nrows, brows):
+        for col_off in range(0, ncols, bcols):
+            yield (
+                row_off, col_off,
+                min(brows, nrows - row_off), min(bcols, ncols - col_off))
+
+
 def _generate_group_name(angle, angle_dir, bandId):
     tag = ANGLES_TAGS[angle].format(bandId=bandId)
     return posixpath.join(tag, angle_dir)
@@ -317,6 +578,101 @@ def parse_angles(
     return angles_data
 
 
+def parse_angles_cube(
+        metadatafile=None, metadatastr=None,
+        angles=ALL_ANGLES,
+        angle_dirs=ALL_DIRS,
+        bandIds=None
+):
+    """Parse angles of all bands from GRANULE metadata in one traversal
+
+    Parameters
+    ----------
+    metadatafile : str, optional
+        path to metadata file
+    metadatastr : str, optional
+        metadata string
+    angles : list of str
+        angles to parse
+        subset of ALL_ANGLES
+    angle_dirs : list of str
+        angle diretions
+        subset of ALL_DIRS
+    bandIds : list of int, optional
+        bands to get viewing angles for
+        default: all bands in the document
+
+    Returns
+    -------
+    cube : ndarray (band, angle, direction, rows, cols) float32
+        angles with detectors merged
+        Sun angles are the same for all bands
+    coords : dict
+        band : list of int
+            bandId of each band
+        angle : list of str
+        direction : list of str
+        detector : ndarray (band, rows, cols) int
+            detectorId the viewing angles were taken from
+            0 where no detector has a value
+    """
+    root = converters.get_root(metadatafile, metadatastr)
+    return _parse_angles_cube(root, angles, angle_dirs, bandIds)
+
+
+def _parse_angles_cube(root, angles, angle_dirs, bandIds=None):
+    """parse_angles_cube with parsed root"""
+    nsmap = root.nsmap
+    grids = defaultdict(list)
+    for e in converters.get_elements(root, 'Viewing_Incidence_Angles_Grids'):
+        grids[int(e.attrib['bandId'])].append(e)
+    if bandIds is None:
+        bandIds = sorted(grids)
+    missing = set(bandIds).difference(grids)
+    if missing:
+        raise ValueError(
+            'No viewing angle grids for bands {}.'.format(sorted(missing)))
+
+    sun = {}
+    if 'Sun' in angles:
+        for angle_dir in angle_dirs:
+            sun[angle_dir] = _get_values(root, _generate_group_name('Sun', angle_dir, None))
+
+    cube = None
+    detector = None
+    for i, bandId in enumerate(bandIds):
+        ee = grids[bandId]
+        detectorIds = np.array([int(e.attrib['detectorId']) for e in ee])
+        index = None
+        for j, angle in enumerate(angles):
+            for k, angle_dir in enumerate(angle_dirs):
+                if angle == 'Sun':
+                    values = sun[angle_dir]
+                else:
+                    stack = _stack_detector_grids(ee, angle_dir, nsmap)
+                    if index is None:
+                        index = _last_finite_index(stack)
+                    values = _merge_detectors(stack, index=index)
+                if cube is None:
+                    cube = np.full(
+                        (len(bandIds), len(angles), len(angle_dirs)) + values.shape,
+                        np.nan, dtype='f4')
+                    detector = np.zeros((len(bandIds),) + values.shape, dtype=int)
+                elif values.shape != cube.shape[3:]:
+                    raise ValueError('Angle grids have different shapes.')
+                cube[i, j, k] = values
+        if index is not None:
+            found = np.isfinite(cube[i, angles.index('Viewing_Incidence'), 0])
+            detector[i] = np.where(found, detectorIds[index], 0)
+
+    coords = dict(
+        band=list(bandIds),
+        angle=list(angles),
+        direction=list(angle_dirs),
+        detector=detector)
+    return cube, coords
+
+
 def parse_resample_angles(
         metadatafile=None, metadatastr=None,
         angles=ALL_ANGLES,
@@ -324,6 +680,11 @@ def parse_resample_angles(
         bandId=0,
         dst_res_predefined=None,
         resample_method='rasterio',
+        window=None,
+        buffers=None,
+        cache=None,
+        max_workers=None,
+        executor=None,
         **resample_kwargs
 ):
     """Parse angles from GRANULE metadata and resample
@@ -347,12 +708,37 @@ def parse_resample_angles(
     dst_res_predefined : int, optional
         predefined destination resolution
         one of 10, 20, 60
-    resample_method : str in ['imresize', 'rasterio']
+    resample_method : str in ['imresize', 'rasterio', 'separable', 'zoom']
         method to use for resampling
-        either based on scipy.misc.imresize
-        or based on rasterio.warp.reproject
+        based on scipy.misc.imresize, rasterio.warp.reproject,
+        utils.resample_separable or scipy.ndimage.zoom
+        separable is the fastest for the granule CRS
+    window : tuple or rasterio.windows.Window, optional
+        (row_off, col_off, nrows, ncols) in the destination grid
+        only compute the angles in this window
+        requires dst_res_predefined or dst_transform
+        and resample_method rasterio or separable
+        see also iter_resample_angles_blocks
+    buffers : utils.BufferPool, optional
+        write the angles to arrays from this pool
+        instead of allocating new ones
+        the arrays are overwritten by the next call
+        with the same pool, angles and destination shape
+        requires dst_res_predefined or dst_shape
+        and resample_method rasterio or separable
+    cache : angles_cache.AnglesCache, optional
+        persistent cache of resampled angles
+        cached angles are returned as float32 memmap
+        requires dst_res_predefined or dst_transform and dst_shape
+    max_workers : int, optional
+        resample the angle grids on a thread pool
+        with this many threads
+    executor : concurrent.futures.Executor, optional
+        resample the angle grids on this executor
+        e.g. a shared ThreadPoolExecutor
     **resample_kwargs : additional keyword arguments
         passed to the resampling function
+        e.g. dtype for rasterio and separable
 
     Returns
     -------
@@ -361,6 +747,7 @@ def parse_resample_angles(
     """
     resample_funcs = {
         'rasterio': _get_resample_angles_rasterio,
+        'separable': _get_resample_angles_separable,
         'zoom': _get_resample_angles_zoom,
         'imresize': _get_resample_angles_imresize
     }
@@ -376,15 +763,552 @@ def parse_resample_angles(
     kw = {}
     if dst_res_predefined is not None:
         kw['dst_shape'] = meta['image_shape'][dst_res_predefined]
-        if resample_method == 'rasterio':
+        if resample_method in ['rasterio', 'separable']:
             kw['dst_transform'] = meta['image_transform'][dst_res_predefined]
             kw['meta'] = meta
 
     kw.update(resample_kwargs)
 
+    if window is not None:
+        if resample_method not in ['rasterio', 'separable']:
+            raise ValueError(
+                'window requires resample_method \'rasterio\' or \'separable\'.')
+        if kw.get('dst_transform') is None:
+            raise ValueError('window requires dst_res_predefined or dst_transform.')
+        kw['dst_transform'], kw['dst_shape'] = _window_transform_shape(
+            window, kw['dst_transform'])
+
+    if buffers is not None:
+        if resample_method not in _default_dtypes:
+            raise ValueError(
+                'buffers requires resample_method \'rasterio\' or \'separable\'.')
+        if kw.get('dst_shape') is None:
+            raise ValueError('buffers requires dst_res_predefined or dst_shape.')
+        dtype = kw.get('dtype', _default_dtypes[resample_method])
+
+    if cache is not None:
+        if kw.get('dst_transform') is None or kw.get('dst_shape') is None:
+            raise ValueError(
+                'cache requires dst_res_predefined or dst_transform and dst_shape.')
+        params = {k: v for k, v in kw.items() if k not in ['meta', 'out', 'dtype']}
+        params['resample_method'] = resample_method
+
+    tasks = []
     angles_data = defaultdict(dict)
     for angle in angles:
         for angle_dir in angle_dirs:
             group = _generate_group_name(angle, angle_dir, bandId=bandId)
-            angles_data[angle][angle_dir] = resample_func(root, group, **kw)
+            key = None
+            if cache is not None:
+                key = cache.key(
+                    meta['tile_ID'], bandId if angle == 'Viewing_Incidence' else None,
+                    angle, angle_dir, **params)
+                data = cache.get(key)
+                if data is not None:
+                    angles_data[angle][angle_dir] = data
+                    continue
+            task_kw = dict(kw)
+            if buffers is not None:
+                task_kw['out'] = buffers.get((angle, angle_dir), kw['dst_shape'], dtype)
+            tasks.append((angle, angle_dir, group, key, task_kw))
+
+    def _resample(task):
+        _, _, group, key, task_kw = task
+        data = resample_func(root, group, **task_kw)
+        if key is not None:
+            data = cache.put(key, data)
+        return data
+
+    for task, data in zip(tasks, _map(_resample, tasks, max_workers, executor)):
+        angles_data[task[0]][task[1]] = data
     return angles_data
+
+
+def _map(func, items, max_workers=None, executor=None):
+    """Map func over items serially, on a thread pool or on executor"""
+    if executor is not None:
+        return list(executor.map(func, items))
+    if max_workers is None or max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+        return list(pool.map(func, items))
+
+
+def parse_resample_angles_batch(
+        metadatafiles, max_workers=None, executor=None, **kwargs):
+    """Parse and resample the angles of many granules in parallel
+
+    Granules are processed concurrently on a thread pool.
+    The resampling releases the GIL, so threads scale
+    without copying the results between processes.
+
+    Parameters
+    ----------
+    metadatafiles : list of str
+        paths to GRANULE metadata files
+    max_workers : int, optional
+        number of threads
+        default: serial
+    executor : concurrent.futures.Executor, optional
+        run on this executor instead
+    **kwargs : additional keyword arguments
+        passed to parse_resample_angles
+        buffers cannot be shared between concurrent granules
+
+    Returns
+    -------
+    list of nested dict
+        parse_resample_angles output for each file
+    """
+    parallel = executor is not None or (max_workers is not None and max_workers > 1)
+    if parallel and kwargs.get('buffers') is not None:
+        raise ValueError('buffers cannot be used with concurrent granules.')
+    return _map(
+        lambda metadatafile: parse_resample_angles(metadatafile, **kwargs),
+        list(metadatafiles), max_workers, executor)
+
+
+def _angle_layers(cube, angles, angle_dirs):
+    """Flatten angles cube into layers to resample together
+
+    Sun angles are taken from the first band only.
+    Azimuth is split into sine and cosine components
+    so that interpolation across 0/360 is correct.
+
+    Returns
+    -------
+    layers : ndarray (layer, rows, cols)
+    index : dict
+        (band index or None for Sun, angle index, direction index)
+        -> layer index (of the sine layer for Azimuth)
+    """
+    layers = []
+    index = {}
+    for i in range(len(cube)):
+        for j, angle in enumerate(angles):
+            if angle == 'Sun' and i > 0:
+                continue
+            for k, angle_dir in enumerate(angle_dirs):
+                index[None if angle == 'Sun' else i, j, k] = len(layers)
+                grid = cube[i, j, k]
+                if angle_dir == 'Azimuth':
+                    rad = np.deg2rad(grid)
+                    layers += [np.sin(rad), np.cos(rad)]
+                else:
+                    layers.append(grid)
+    return np.stack(layers), index
+
+
+def parse_resample_angles_cube(
+        metadatafile=None, metadatastr=None,
+        angles=ALL_ANGLES,
+        angle_dirs=ALL_DIRS,
+        bandIds=None,
+        dst_res_predefined=None,
+        dst_res=None,
+        dst_transform=None,
+        dst_crs=None,
+        dst_shape=None,
+        extrapolate=True,
+        resampling=None,
+        dtype='f4'
+):
+    """Parse angles of all bands and resample them in a single warp
+
+    All grids (Sun angles once, viewing angles of every band)
+    are stacked into one multi-band source and reprojected
+    with a single rasterio.warp.reproject call,
+    so the coordinate transformation is computed only once.
+    Azimuth is resampled as sine and cosine components
+    and recombined, which keeps values near 0/360 correct.
+
+    Parameters
+    ----------
+    metadatafile : str, optional
+        path to metadata file
+    metadatastr : str, optional
+        metadata string
+    angles : list of str
+        angles to parse
+        subset of ALL_ANGLES
+    angle_dirs : list of str
+        angle diretions
+        subset of ALL_DIRS
+    bandIds : list of int, optional
+        bands to get viewing angles for
+        default: all bands in the document
+    dst_res_predefined : int, optional
+        predefined destination resolution
+        one of 10, 20, 60
+    dst_res : int, optional
+        target resolution
+    dst_transform : Affine, optional
+        transform to resample to
+    dst_crs : dict or CRS, optional
+        destination CRS
+    dst_shape : tuple, optional
+        destinatinon shape
+    extrapolate : bool or str
+        extrapolate to fill NaN areas
+        True or one of EXTRAPOLATE_METHODS
+        True uses 'rbf'
+    resampling : int, optional
+        resampling method
+        see rasterio.warp.Resampling
+        default: Resampling.bilinear
+    dtype : str or numpy.dtype
+        output data type
+
+    Returns
+    -------
+    cube : ndarray (band, angle, direction, rows, cols)
+        resampled angles
+        Sun angles are the same for all bands
+    coords : dict
+        band, angle, direction : list
+            labels of the first three axes
+        transform : Affine
+            destination transform
+        crs : rasterio.crs.CRS
+            destination CRS
+    """
+    import rasterio.crs
+    import rasterio.warp
+
+    root = converters.get_root(metadatafile, metadatastr)
+    meta = s2meta.parse_granule_metadata_xml(root)
+    cube, coords = _parse_angles_cube(root, angles, angle_dirs, bandIds)
+
+    res = _get_res(root, _generate_group_name('Sun', 'Zenith', None))
+    src_transform = s2utils.res_pos_to_affine(res, meta['image_geoposition'][10])
+    src_crs = rasterio.crs.CRS.from_user_input(meta['projection'])
+    src_height, src_width = cube.shape[-2:]
+
+    if dst_res_predefined is not None:
+        dst_transform = meta['image_transform'][dst_res_predefined]
+        dst_shape = meta['image_shape'][dst_res_predefined]
+    if dst_crs is None:
+        dst_crs = src_crs
+    else:
+        dst_crs = rasterio.crs.CRS.from_user_input(dst_crs)
+    if dst_crs != src_crs or dst_res is not None:
+        src_bounds = converters.trans_shape_to_bounds(src_transform, (src_height, src_width))
+        dst_transform, dst_width, dst_height = rasterio.warp.calculate_default_transform(
+            src_crs, dst_crs, src_width, src_height, *src_bounds, resolution=dst_res)
+        dst_shape = (dst_height, dst_width)
+    if dst_transform is None:
+        dst_transform = src_transform
+    if dst_shape is None:
+        dst_shape = (src_height, src_width)
+
+    layers, index = _angle_layers(cube, angles, angle_dirs)
+    if extrapolate:
+        layers = _extrapolate_nan(layers, extrapolate)
+    resampled = utils.resample(
+        layers,
+        src_transform=src_transform,
+        src_crs=src_crs,
+        dst_transform=dst_transform,
+        dst_crs=dst_crs,
+        dst_shape=(len(layers),) + tuple(dst_shape),
+        resampling=resampling,
+        src_nodata=np.nan,
+        dst_nodata=np.nan,
+        dtype=dtype)
+
+    out = np.empty(cube.shape[:3] + tuple(dst_shape), dtype)
+    for i in range(len(cube)):
+        for j, angle in enumerate(angles):
+            for k, angle_dir in enumerate(angle_dirs):
+                layer = index[None if angle == 'Sun' else i, j, k]
+                if angle_dir == 'Azimuth':
+                    azimuth = np.rad2deg(np.arctan2(resampled[layer], resampled[layer + 1]))
+                    np.mod(azimuth, 360, out=out[i, j, k])
+                else:
+                    out[i, j, k] = resampled[layer]
+
+    coords = dict(
+        band=coords['band'], angle=coords['angle'], direction=coords['direction'],
+        transform=dst_transform, crs=dst_crs)
+    return out, coords
+
+
+def iter_resample_angles_blocks(
+        metadatafile=None, metadatastr=None,
+        angles=ALL_ANGLES,
+        angle_dirs=ALL_DIRS,
+        bandId=0,
+        dst_res_predefined=10,
+        block_shape=(1024, 1024),
+        resample_method='separable',
+        extrapolate=True,
+        buffers=None,
+        **resample_kwargs
+):
+    """Parse angles from GRANULE metadata and resample block by block
+
+    The angle grids are parsed and extrapolated once.
+    Only one block per angle and direction is held
+    in memory at a time.
+
+    Parameters
+    ----------
+    metadatafile : str, optional
+        path to metadata file
+    metadatastr : str, optional
+        metadata string
+    angles : list of str
+        angles to parse
+        subset of ALL_ANGLES
+    angle_dirs : list of str
+        angle diretions
+        subset of ALL_DIRS
+    bandId : int
+        use this band to retrieve
+        viewing angles
+        default: 0
+    dst_res_predefined : int
+        destination resolution
+        one of 10, 20, 60
+    block_shape : tuple
+        (rows, cols) of the blocks
+        blocks at the right and bottom edge may be smaller
+    resample_method : str in ['rasterio', 'separable']
+        method to use for resampling
+        see parse_resample_angles
+    extrapolate : bool or str
+        extrapolate to fill NaN areas
+        True or one of EXTRAPOLATE_METHODS
+        True uses 'rbf'
+    buffers : utils.BufferPool, optional
+        write the blocks to arrays from this pool
+        each block overwrites the previous one of the same shape
+    **resample_kwargs : additional keyword arguments
+        passed to utils.resample or utils.resample_separable
+        e.g. dtype
+
+    Yields
+    ------
+    window : tuple
+        (row_off, col_off, nrows, ncols) of the block
+    nested dict : angles > angles_dirs > ndarray
+        angles in the block
+    """
+    resample_func = _window_resample_func(resample_method)
+    dtype = resample_kwargs.get('dtype', _default_dtypes[resample_method])
+
+    root = converters.get_root(metadatafile, metadatastr)
+    meta = s2meta.parse_granule_metadata_xml(root)
+    dst_transform = meta['image_transform'][dst_res_predefined]
+    dst_shape = meta['image_shape'][dst_res_predefined]
+    sources = _get_window_sources(
+        root, meta, angles, angle_dirs, bandId, resample_method, extrapolate)
+
+    for window in _iter_windows(dst_shape, block_shape):
+        transform, shape = _window_transform_shape(window, dst_transform)
+        angles_data = defaultdict(dict)
+        for (angle, angle_dir), (angles_raw, kw) in sources.items():
+            if buffers is not None:
+                kw['out'] = buffers.get((angle, angle_dir), shape, dtype)
+            angles_data[angle][angle_dir] = resample_func(
+                angles_raw, dst_shape=shape, dst_transform=transform,
+                **kw, **resample_kwargs)
+        yield window, angles_data
+
+
+def _window_resample_func(resample_method):
+    """Resample function for windows of the destination grid"""
+    if resample_method == 'separable':
+        return utils.resample_separable
+    elif resample_method == 'rasterio':
+        return functools.partial(
+            utils.resample, src_nodata=np.nan, dst_nodata=np.nan)
+    raise ValueError(
+        'resample_method must be one of {}.'.format(['rasterio', 'separable']))
+
+
+def _get_window_sources(root, meta, angles, angle_dirs, bandId, resample_method, extrapolate):
+    """Parse and extrapolate angle grids for windowed resampling
+
+    Returns
+    -------
+    dict
+        (angle, angle_dir) -> (angles_raw, source keyword arguments)
+    """
+    sources = {}
+    for angle in angles:
+        for angle_dir in angle_dirs:
+            group = _generate_group_name(angle, angle_dir, bandId=bandId)
+            angles_raw, src_transform, src_crs = _get_angles_with_gref(root, group, meta=meta)
+            if extrapolate:
+                angles_raw = _extrapolate_nan(angles_raw, extrapolate)
+            kw = dict(src_transform=src_transform)
+            if resample_method == 'rasterio':
+                import rasterio.crs
+                kw['src_crs'] = rasterio.crs.CRS(src_crs)
+            sources[angle, angle_dir] = angles_raw, kw
+    return sources
+
+
+def _resample_block(
+        angles_raw, source_kw, resample_func, dst_transform, resample_kwargs,
+        block_info=None):
+    """Resample the angles in a dask block"""
+    (row_start, row_stop), (col_start, col_stop) = block_info[None]['array-location']
+    window = (row_start, col_start, row_stop - row_start, col_stop - col_start)
+    transform, shape = _window_transform_shape(window, dst_transform)
+    return resample_func(
+        angles_raw, dst_shape=shape, dst_transform=transform,
+        **source_kw, **resample_kwargs)
+
+
+def lazy_resample_angles(
+        metadatafile=None, metadatastr=None,
+        angles=ALL_ANGLES,
+        angle_dirs=ALL_DIRS,
+        bandId=0,
+        dst_res_predefined=10,
+        chunks=(1024, 1024),
+        resample_method='separable',
+        extrapolate=True,
+        dtype=None,
+        **resample_kwargs
+):
+    """Parse angles from GRANULE metadata and resample lazily
+
+    The angle grids are parsed and extrapolated right away.
+    Resampling is deferred to the chunks of dask arrays,
+    so each chunk is computed on demand and independently.
+    Requires dask.
+
+    Parameters
+    ----------
+    metadatafile : str, optional
+        path to metadata file
+    metadatastr : str, optional
+        metadata string
+    angles : list of str
+        angles to parse
+        subset of ALL_ANGLES
+    angle_dirs : list of str
+        angle diretions
+        subset of ALL_DIRS
+    bandId : int
+        use this band to retrieve
+        viewing angles
+        default: 0
+    dst_res_predefined : int
+        destination resolution
+        one of 10, 20, 60
+    chunks : tuple or int
+        dask chunks of the destination grid
+    resample_method : str in ['rasterio', 'separable']
+        method to use for resampling
+        see parse_resample_angles
+    extrapolate : bool or str
+        extrapolate to fill NaN areas
+        True or one of EXTRAPOLATE_METHODS
+        True uses 'rbf'
+    dtype : str or numpy.dtype, optional
+        output data type
+        default: float32 for separable, float64 for rasterio
+    **resample_kwargs : additional keyword arguments
+        passed to utils.resample or utils.resample_separable
+
+    Returns
+    -------
+    nested dict : angles > angles_dirs > dask.array.Array
+        angles dictionary
+    """
+    root = converters.get_root(metadatafile, metadatastr)
+    meta = s2meta.parse_granule_metadata_xml(root)
+    return _lazy_resample_angles(
+        root, meta, angles, angle_dirs, bandId, dst_res_predefined, chunks,
+        resample_method, extrapolate, dtype, resample_kwargs)
+
+
+def _lazy_resample_angles(
+        root, meta, angles, angle_dirs, bandId, dst_res_predefined, chunks,
+        resample_method, extrapolate, dtype, resample_kwargs):
+    """lazy_resample_angles with parsed root and granule metadata"""
+    import dask.array as da
+
+    resample_func = _window_resample_func(resample_method)
+    if dtype is None:
+        dtype = _default_dtypes[resample_method]
+    resample_kwargs = dict(resample_kwargs, dtype=dtype)
+
+    dst_transform = meta['image_transform'][dst_res_predefined]
+    dst_shape = tuple(meta['image_shape'][dst_res_predefined])
+    chunks = da.core.normalize_chunks(chunks, dst_shape)
+    sources = _get_window_sources(
+        root, meta, angles, angle_dirs, bandId, resample_method, extrapolate)
+
+    angles_data = defaultdict(dict)
+    for (angle, angle_dir), (angles_raw, kw) in sources.items():
+        token = da.core.tokenize(
+            meta['tile_ID'], angle, angle_dir, angles_raw, kw,
+            resample_method, tuple(dst_transform), chunks, resample_kwargs)
+        angles_data[angle][angle_dir] = da.map_blocks(
+            _resample_block,
+            angles_raw=angles_raw,
+            source_kw=kw,
+            resample_func=resample_func,
+            dst_transform=dst_transform,
+            resample_kwargs=resample_kwargs,
+            chunks=chunks,
+            dtype=dtype,
+            meta=np.empty((0, 0), dtype),
+            name='s2-angles-{}-{}-{}'.format(angle, angle_dir, token))
+    return angles_data
+
+
+def lazy_resample_angles_xarray(
+        metadatafile=None, metadatastr=None,
+        angles=ALL_ANGLES,
+        angle_dirs=ALL_DIRS,
+        bandId=0,
+        dst_res_predefined=10,
+        chunks=(1024, 1024),
+        resample_method='separable',
+        extrapolate=True,
+        dtype=None,
+        **resample_kwargs
+):
+    """Parse angles from GRANULE metadata and resample lazily to xarray
+
+    Same as lazy_resample_angles but stacked into one DataArray
+    with x and y coordinates of the pixel centers
+    from the granule image_transform.
+    Requires dask and xarray.
+    See lazy_resample_angles for the parameters.
+
+    Returns
+    -------
+    xarray.DataArray (angle, direction, y, x)
+        attrs crs and transform of the destination grid
+    """
+    import xarray as xr
+    import dask.array as da
+
+    root = converters.get_root(metadatafile, metadatastr)
+    meta = s2meta.parse_granule_metadata_xml(root)
+    transform = meta['image_transform'][dst_res_predefined]
+    nrows, ncols = meta['image_shape'][dst_res_predefined]
+
+    angles_data = _lazy_resample_angles(
+        root, meta, angles, angle_dirs, bandId, dst_res_predefined, chunks,
+        resample_method, extrapolate, dtype, resample_kwargs)
+    data = da.stack([
+        da.stack([angles_data[angle][angle_dir] for angle_dir in angle_dirs])
+        for angle in angles])
+    return xr.DataArray(
+        data,
+        name='angles',
+        dims=('angle', 'direction', 'y', 'x'),
+        coords=dict(
+            angle=list(angles),
+            direction=list(angle_dirs),
+            y=transform.f + (np.arange(nrows) + 0.5) * transform.e,
+            x=transform.c + (np.arange(ncols) + 0.5) * transform.a),
+        attrs=dict(crs=meta['projection'], transform=tuple(transform)[:6]))
@@ -0,0 +1,194 @@
+"""Persistent on-disk cache of resampled S2 angle grids"""
+import os
+import re
+import glob
+import hashlib
+import threading
+
+import numpy as np
+
+# uint16 quantization of angles in [-180, 540) degrees
+# resolution about 0.011 degrees, QUANT_NODATA is NaN
+QUANT_OFFSET = -180.
+QUANT_SCALE = 720. / 65534
+QUANT_NODATA = 65535
+
+
+def _processing_baseline(tile_ID):
+    """Processing baseline (e.g. 'N02.04') from tile ID or None"""
+    match = re.search(r'_N(\d{2})\.?(\d{2})', tile_ID)
+    if match is None:
+        return None
+    return 'N{}.{}'.format(*match.groups())
+
+
+def quantize(a):
+    """Quantize angles in degrees to uint16"""
+    q = np.round((np.clip(a, QUANT_OFFSET, -QUANT_OFFSET * 3) - QUANT_OFFSET) / QUANT_SCALE)
+    q[~np.isfinite(a)] = QUANT_NODATA
+    return q.astype('u2')
+
+
+def dequantize(q):
+    """Angles in degrees (float32) from quantize output"""
+    a = q.astype('f4') * np.float32(QUANT_SCALE) + np.float32(QUANT_OFFSET)
+    a[q == QUANT_NODATA] = np.nan
+    return a
+
+
+class AnglesCache(object):
+    """Resampled angle grids stored as .npy files in a directory
+
+    Entries are keyed by tile ID, processing baseline, band,
+    angle, direction, destination transform and shape
+    and the resampling parameters.
+    The least recently used entries are removed
+    when the total size exceeds max_bytes.
+
+    Parameters
+    ----------
+    path : str
+        cache directory
+        created if it does not exist
+    max_bytes : int, optional
+        maximum total size of the cached files
+        default: unbounded
+    quantize : bool
+        store uint16 instead of float32
+        (half the size, about 0.011 degrees resolution)
+        cached arrays are then decoded to float32
+        instead of returned as memmap
+
+    Attributes
+    ----------
+    hits, misses : int
+        number of get calls that found / did not find an entry
+    """
+
+    def __init__(self, path, max_bytes=None, quantize=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.quantize = quantize
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def __repr__(self):
+        return '{}({!r}, max_bytes={!r}, quantize={!r})'.format(
+            type(self).__name__, self.path, self.max_bytes, self.quantize)
+
+    def key(self, tile_ID, bandId, angle, angle_dir, dst_transform, dst_shape, **params):
+        """Cache key for a resampled angle grid
+
+        Parameters
+        ----------
+        tile_ID : str
+            granule tile ID
+            including the processing baseline
+        bandId : int or None
+            band of viewing angles
+            None for Sun angles
+        angle, angle_dir : str
+            angle and direction
+        dst_transform : affine.Affine
+            destination transform
+        dst_shape : tuple
+            destination shape
+        **params
+            resampling parameters affecting the values
+
+        Returns
+        -------
+        str
+        """
+        fields = [
+            tile_ID, _processing_baseline(tile_ID), bandId, angle, angle_dir,
+            tuple(dst_transform)[:6], tuple(dst_shape), self.quantize,
+            sorted((k, repr(v)) for k, v in params.items())]
+        digest = hashlib.sha1(repr(fields).encode('utf-8')).hexdigest()
+        tile = re.search(r'T\d{2}[A-Z]{3}', tile_ID)
+        return '_'.join([
+            tile.group(0) if tile else 'granule', fields[1] or 'N', angle, angle_dir, digest])
+
+    def _filename(self, key):
+        return os.path.join(self.path, key + '.npy')
+
+    def _files(self):
+        return glob.glob(os.path.join(self.path, '*.npy'))
+
+    def _load(self, fn):
+        data = np.load(fn, mmap_mode='r')
+        if self.quantize:
+            data = dequantize(data)
+        return data
+
+    def get(self, key):
+        """Get cached angles or None
+
+        Returns
+        -------
+        numpy.memmap (float32) or ndarray (float32) or None
+        """
+        fn = self._filename(key)
+        try:
+            data = self._load(fn)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # mark as recently used
+        os.utime(fn)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Store angles and return them as read back from the cache"""
+        fn = self._filename(key)
+        # unique per process and thread writing the same key
+        tmp = '{}.{}.{}.tmp'.format(fn, os.getpid(), threading.get_ident())
+        if self.quantize:
+            data = quantize(data)
+        else:
+            data = np.asarray(data, dtype='f4')
+        with open(tmp, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp, fn)
+        self._evict(keep=fn)
+        return self._load(fn)
+
+    def _evict(self, keep=None):
+        """Remove least recently used files until below max_bytes"""
+        if self.max_bytes is None:
+            return
+        entries = []
+        for fn in self._files():
+            try:
+                st = os.stat(fn)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, fn))
+        total = sum(size for _, size, _ in entries)
+        for _, size, fn in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if fn == keep:
+                continue
+            try:
+                os.remove(fn)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # e.g. still memory-mapped by a returned array on Windows
+                continue
+            total -= size
+
+    @property
+    def nbytes(self):
+        """Total size of the cached files in bytes"""
+        return sum(os.path.getsize(fn) for fn in self._files())
+
+    def clear(self):
+        """Remove all cached files and reset counters"""
+        for fn in self._files():
+            os.remove(fn)
+        self.hits = 0
+        self.misses = 0
@@ -1,39 +1,82 @@
+import io
 import re
 import os.path
-import functools
+import concurrent.futures
 
 from . import metafile
 from . import utils as s2utils
 
 from satmeta import converters
+from satmeta.product import open_product
+from satmeta.schema import Field, Schema
+from satmeta.lazy import build_metadata
+from satmeta.records import S2GranuleMetadata
 
 _all_res = [10, 20, 60]
 
-
-def _get_sizes(root):
-    """Get image sizes for all available resolutions"""
-    sizes = {}
+# angle grid subtrees in GRANULE metadata
+_angle_grid_tags = ['Sun_Angles_Grid', 'Viewing_Incidence_Angles_Grids']
+
+# header field tags of GRANULE metadata, all inside Tile_Geocoding
+_granule_header_tags = [
+    'TILE_ID', 'HORIZONTAL_CS_CODE', 'NROWS', 'NCOLS', 'ULX', 'ULY', 'Tile_Geocoding']
+
+# scalar field tags for streaming GRANULE metadata
+_granule_stream_tags = [
+    'TILE_ID', 'HORIZONTAL_CS_CODE', 'CLOUDY_PIXEL_PERCENTAGE',
+    'NROWS', 'NCOLS', 'ULX', 'ULY', 'ZENITH_ANGLE', 'AZIMUTH_ANGLE']
+
+
+def _granule_fields():
+    """Declare GRANULE meta data fields"""
+    mean_viewing = 'Mean_Viewing_Incidence_Angle_List/Mean_Viewing_Incidence_Angle/{}'
+    fields = {
+        'tile_ID': Field('TILE_ID'),
+        'sun_zenith': Field('Mean_Sun_Angle/ZENITH_ANGLE', to_type=float),
+        'sun_azimuth': Field('Mean_Sun_Angle/AZIMUTH_ANGLE', to_type=float),
+        'sensor_zenith': Field(mean_viewing.format('ZENITH_ANGLE'), to_type=float, many=True),
+        'sensor_azimuth': Field(mean_viewing.format('AZIMUTH_ANGLE'), to_type=float, many=True),
+        'projection': Field('HORIZONTAL_CS_CODE'),
+        'cloud_cover_percentage': Field('CLOUDY_PIXEL_PERCENTAGE', to_type=float)}
     for res in _all_res:
-        sizes[res] = {}
         for dim in ['NROWS', 'NCOLS']:
-            sizetag = (
-                    './/Size[@resolution=\'{res}\']/{dim}'
-                    ''.format(res=res, dim=dim))
-            sizes[res][dim] = int(root.findall(sizetag)[0].text)
-    return sizes
+            fields['image_size', res, dim] = Field(
+                'Size[@resolution=\'{res}\']/{dim}'.format(res=res, dim=dim),
+                index=0, to_type=int)
+        for corner in ['ULX', 'ULY']:
+            fields['image_geoposition', res, corner] = Field(
+                'Geoposition[@resolution=\'{res}\']/{corner}'.format(res=res, corner=corner),
+                index=0, to_type=int)
+    return fields
 
 
-def _get_geopositions(root):
-    """Get geoposition from XML root"""
-    geopos = {}
-    for res in _all_res:
-        geopos[res] = {}
-        for corner in ['ULX', 'ULY']:
-            sizetag = (
-                    './/Geoposition[@resolution=\'{res}\']/{corner}'
-                    ''.format(res=res, corner=corner))
-            geopos[res][corner] = int(root.findall(sizetag)[0].text)
-    return geopos
+GRANULE_SCHEMA = Schema(_granule_fields())
+
+PRODUCT_SCHEMA = Schema({
+    'title': Field('PRODUCT_URI', required=False),
+    'sensing_time': Field('PRODUCT_START_TIME', to_type=converters.parse_datetime),
+    'processing_level': Field('PROCESSING_LEVEL'),
+    'spacecraft_name': Field('SPACECRAFT_NAME')})
+
+PRODUCT_L1C_SCHEMA = Schema({
+    'orbit_direction': Field('SENSING_ORBIT_DIRECTION'),
+    'quantification_value': Field('QUANTIFICATION_VALUE', to_type=int),
+    'reflectance_conversion': Field('Reflectance_Conversion/U', to_type=float),
+    'irradiance_values': Field(
+        'Reflectance_Conversion/Solar_Irradiance_List/SOLAR_IRRADIANCE',
+        to_type=float, many=True)})
+
+
+def _nest_fields(values):
+    """Nest values with (group, res, key) keys into group > res > key dicts"""
+    nested = {}
+    for key, value in values.items():
+        if isinstance(key, tuple):
+            group, res, name = key
+            nested.setdefault(group, {}).setdefault(res, {})[name] = value
+        else:
+            nested[key] = value
+    return nested
 
 
 def _generate_image_transform(image_geoposition):
@@ -104,10 +147,47 @@ def _spacecraft_from_spacecraft_name(spacecraft_name):
                 'Unable to get sensor ID from spacecraft name \'{}\'.'.format(spacecraft_name))
 
 
-def parse_granule_metadata(metadatafile=None, metadatastr=None):
-    """Parse S2 GRANULE meta data from file or string"""
-    root = converters.get_root(metadatafile, metadatastr)
-    return parse_granule_metadata_xml(root)
+def parse_granule_metadata(
+        metadatafile=None, metadatastr=None, stream=False, skip_angle_grids=True,
+        lazy=False, record=False):
+    """Parse S2 GRANULE meta data from file or string
+
+    Parameters
+    ----------
+    metadatafile : str, optional
+        path to metadata file
+    metadatastr : bytes or str, optional
+        metadata file contents
+    stream : bool
+        parse incrementally with bounded memory
+        see parse_granule_metadata_stream
+    skip_angle_grids : bool
+        with stream, discard angle grid subtrees
+        without inspecting their elements
+    lazy : bool
+        return LazyMetadata computing image transforms,
+        shapes, bounds and crs on first access
+    record : bool
+        return compact records.S2GranuleMetadata
+    """
+    lazy = lazy or record
+    if stream:
+        if metadatafile is not None:
+            source = metadatafile
+        elif metadatastr is not None:
+            if isinstance(metadatastr, str):
+                metadatastr = metadatastr.encode('utf-8')
+            source = io.BytesIO(metadatastr)
+        else:
+            raise ValueError('Either metadatafile or metadatastr must be specified.')
+        metadata = parse_granule_metadata_stream(
+            source, skip_angle_grids=skip_angle_grids, lazy=lazy)
+    else:
+        root = converters.get_root(metadatafile, metadatastr)
+        metadata = parse_granule_metadata_xml(root, lazy=lazy)
+    if record:
+        return S2GranuleMetadata.from_dict(metadata)
+    return metadata
 
 
 def parse_metadata(metadatafile=None, metadatastr=None):
@@ -116,85 +196,328 @@ def parse_metadata(metadatafile=None, metadatastr=None):
     return parse_metadata_xml(root)
 
 
-def parse_granule_metadata_xml(root):
-    """Parse S2 GRANULE meta data XML"""
-    _get_single = functools.partial(converters.get_single, root)
-    metadata = {
-            'tile_ID': _get_single('TILE_ID'),
-            'sun_zenith': _get_single('Mean_Sun_Angle/ZENITH_ANGLE', to_type=float),
-            'sun_azimuth': _get_single('Mean_Sun_Angle/AZIMUTH_ANGLE', to_type=float),
-            'sensor_zenith': converters.get_all(
-                root,
-                'Mean_Viewing_Incidence_Angle_List/Mean_Viewing_Incidence_Angle/ZENITH_ANGLE',
-                to_type=float),
-            'sensor_azimuth': converters.get_all(
-                root,
-                'Mean_Viewing_Incidence_Angle_List/Mean_Viewing_Incidence_Angle/AZIMUTH_ANGLE',
-                to_type=float),
-            'projection': _get_single('HORIZONTAL_CS_CODE'),
-            'cloud_cover_percentage': _get_single('CLOUDY_PIXEL_PERCENTAGE', to_type=float),
-            'image_size': _get_sizes(root),
-            'image_geoposition': _get_geopositions(root)}
+def parse_granule_metadata_xml(root, lazy=False):
+    """Parse S2 GRANULE meta data XML
+
+    Parameters
+    ----------
+    root : lxml XML root
+        root of GRANULE metadata XML doc
+    lazy : bool
+        return LazyMetadata computing image transforms,
+        shapes, bounds and crs on first access
+    """
+    metadata = _nest_fields(GRANULE_SCHEMA.extract(root))
+    return _postprocess_granule_metadata(metadata, lazy=lazy)
+
+
+_granule_derived_fields = {
+    'image_transform': lambda m: _generate_image_transform(m['image_geoposition']),
+    'image_shape': lambda m: _generate_image_shape(m['image_size']),
+    'image_bounds': lambda m: _generate_image_bounds(m['image_transform'], m['image_shape']),
+    'crs': lambda m: {'init': m['projection']}}
+
+
+def _postprocess_granule_metadata(metadata, lazy=False):
+    """Add derived fields to GRANULE meta data"""
     metadata['tile_name'] = _tile_name_from_tile_ID(metadata['tile_ID'])
-    metadata['image_transform'] = _generate_image_transform(
-            metadata['image_geoposition'])
-    metadata['image_shape'] = _generate_image_shape(metadata['image_size'])
-    metadata['image_bounds'] = _generate_image_bounds(
-            metadata['image_transform'], metadata['image_shape'])
-    metadata['crs'] = {'init': _get_single('HORIZONTAL_CS_CODE')}
-    return metadata
+    return build_metadata(metadata, _granule_derived_fields, lazy=lazy)
 
 
-def _get_title_any_level(root):
-    try:
-        return converters.get_single(root, 'PRODUCT_URI')
-    except ValueError:
-        return converters.get_single(root, 'PRODUCT_URI_2A')
+def _single_value(values, tagname):
+    if len(values) != 1:
+        raise ValueError(
+                'Expected to find a single instance of tag \'{}\'. '
+                'Found {}.'.format(tagname, len(values)))
+    return values[0]
+
+
+def parse_granule_metadata_stream(source, skip_angle_grids=True, lazy=False):
+    """Parse S2 GRANULE meta data incrementally with bounded memory
+
+    Only the scalar fields are collected and elements
+    are cleared as soon as they have been parsed,
+    so memory use does not grow with document size.
+
+    Parameters
+    ----------
+    source : str or file-like
+        path to metadata file or open binary file
+    skip_angle_grids : bool
+        discard Sun_Angles_Grid and Viewing_Incidence_Angles_Grids
+        subtrees as a whole without inspecting their elements
+        otherwise every element is visited and cleared individually
+    lazy : bool
+        return LazyMetadata computing derived fields on first access
+
+    Returns
+    -------
+    dict or LazyMetadata
+        same as parse_granule_metadata_xml
+    """
+    import lxml.etree
+    if skip_angle_grids:
+        tag = _granule_stream_tags + _angle_grid_tags
+    else:
+        tag = None
+    values = {k: [] for k in [
+        'TILE_ID', 'HORIZONTAL_CS_CODE', 'CLOUDY_PIXEL_PERCENTAGE',
+        'Mean_Sun_Angle/ZENITH_ANGLE', 'Mean_Sun_Angle/AZIMUTH_ANGLE']}
+    sensor_angles = {'ZENITH_ANGLE': [], 'AZIMUTH_ANGLE': []}
+    image_size = {res: {} for res in _all_res}
+    image_geoposition = {res: {} for res in _all_res}
+    for _, elem in lxml.etree.iterparse(source, events=('end',), tag=tag):
+        name = elem.tag
+        parent = elem.getparent()
+        parent_name = parent.tag if parent is not None else None
+        if name in values:
+            values[name].append(elem.text)
+        elif parent_name == 'Mean_Sun_Angle':
+            values[parent_name + '/' + name].append(elem.text)
+        elif parent_name == 'Mean_Viewing_Incidence_Angle':
+            sensor_angles[name].append(float(elem.text))
+        elif name in ('NROWS', 'NCOLS', 'ULX', 'ULY'):
+            res = int(parent.get('resolution'))
+            group = image_size if parent_name == 'Size' else image_geoposition
+            # keep the first instance like get_instance
+            group.setdefault(res, {}).setdefault(name, int(elem.text))
+        elem.clear(keep_tail=True)
+        while elem.getprevious() is not None:
+            del parent[0]
+    metadata = {
+            'tile_ID': _single_value(values['TILE_ID'], 'TILE_ID'),
+            'sun_zenith': float(_single_value(
+                values['Mean_Sun_Angle/ZENITH_ANGLE'], 'Mean_Sun_Angle/ZENITH_ANGLE')),
+            'sun_azimuth': float(_single_value(
+                values['Mean_Sun_Angle/AZIMUTH_ANGLE'], 'Mean_Sun_Angle/AZIMUTH_ANGLE')),
+            'sensor_zenith': sensor_angles['ZENITH_ANGLE'],
+            'sensor_azimuth': sensor_angles['AZIMUTH_ANGLE'],
+            'projection': _single_value(values['HORIZONTAL_CS_CODE'], 'HORIZONTAL_CS_CODE'),
+            'cloud_cover_percentage': float(_single_value(
+                values['CLOUDY_PIXEL_PERCENTAGE'], 'CLOUDY_PIXEL_PERCENTAGE')),
+            'image_size': image_size,
+            'image_geoposition': image_geoposition}
+    return _postprocess_granule_metadata(metadata, lazy=lazy)
+
+
+def _iter_header_elements(source, etree, chunk_size=4096):
+    """Pull-parse header elements feeding small chunks of source"""
+    parser = etree.XMLPullParser(events=('end',), tag=_granule_header_tags)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from _iter_header_elements(f, etree, chunk_size)
+        return
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            parser.close()
+            return
+        parser.feed(data)
+        yield from parser.read_events()
+
+
+def scan_granule_header(source):
+    """Scan tile ID and geocoding from the start of S2 GRANULE meta data
+
+    Parsing stops at the end of the Tile_Geocoding element,
+    before the angle grids, so only the first kilobytes
+    of the document are read.
+
+    Parameters
+    ----------
+    source : str or file-like
+        path to metadata file or open binary file
+
+    Returns
+    -------
+    LazyMetadata
+        tile_ID, tile_name, projection, image_size, image_geoposition
+        and derived image_transform, image_shape, image_bounds, crs
+    """
+    import lxml.etree
+    tile_ID = projection = None
+    image_size = {}
+    image_geoposition = {}
+    for _, elem in _iter_header_elements(source, lxml.etree):
+        name = elem.tag
+        if name == 'Tile_Geocoding':
+            break
+        elif name == 'TILE_ID':
+            tile_ID = elem.text
+        elif name == 'HORIZONTAL_CS_CODE':
+            projection = elem.text
+        else:
+            parent = elem.getparent()
+            res = int(parent.get('resolution'))
+            group = image_size if parent.tag == 'Size' else image_geoposition
+            group.setdefault(res, {}).setdefault(name, int(elem.text))
+    if tile_ID is None or projection is None or not image_geoposition:
+        raise ValueError('Tile ID or geocoding not found in granule meta data header.')
+    metadata = {
+            'tile_ID': tile_ID,
+            'projection': projection,
+            'image_size': image_size,
+            'image_geoposition': image_geoposition}
+    return _postprocess_granule_metadata(metadata, lazy=True)
+
+
+def _bbox_predicate(bbox, bbox_crs):
+    """Predicate on granule headers whose bounds intersect bbox"""
+    # bbox in the CRS of the granules, transformed once per CRS
+    projected = {}
+
+    def _intersects(header):
+        projection = header['projection']
+        if projection not in projected:
+            if bbox_crs is None or bbox_crs == projection:
+                projected[projection] = tuple(bbox)
+            else:
+                import rasterio.warp
+                projected[projection] = rasterio.warp.transform_bounds(
+                    bbox_crs, projection, *bbox)
+        left, bottom, right, top = projected[projection]
+        # bounds from geoposition and size without deriving transforms
+        res = min(header['image_geoposition'])
+        ulx, uly = (header['image_geoposition'][res][k] for k in ['ULX', 'ULY'])
+        nrows, ncols = (header['image_size'][res][k] for k in ['NROWS', 'NCOLS'])
+        return not (
+            ulx > right or ulx + ncols * res < left or
+            uly - nrows * res > top or uly < bottom)
+    return _intersects
+
+
+def find_scan_granule_headers(infile, index_cache=None):
+    """Scan the headers of all granules in SAFE or zip
+
+    See scan_granule_header
+
+    Returns
+    -------
+    dict
+        granule metadata file member name -> header
+    """
+    with open_product(infile, index_cache=index_cache) as handle:
+        headers = {}
+        for name in metafile.find_granule_metafiles_in_handle(handle):
+            with handle.open(name) as f:
+                headers[name] = scan_granule_header(f)
+    return headers
+
+
+def find_parse_granule_metadata_selective(
+        infile, tile_names=None, bbox=None, bbox_crs='EPSG:4326', predicate=None,
+        lazy=False, record=False, max_workers=None, index_cache=None):
+    """Find and parse meta data of selected granules in SAFE or zip
+
+    Two-phase alternative to find_parse_granule_metadata
+    for multi-tile products: the headers of all granules are
+    scanned first (see scan_granule_header) and only the
+    granules matching all given criteria are fully parsed,
+    concurrently on a thread pool.
+
+    Parameters
+    ----------
+    infile : str or ProductHandle
+        path to input file SAFE or zip
+        or product opened with satmeta.product.ProductHandle
+    tile_names : list of str, optional
+        tile names, e.g. ['32UNG', '32UPG']
+    bbox : tuple, optional
+        left, bottom, right, top
+        selects granules whose bounds intersect it
+    bbox_crs : str, optional
+        CRS of bbox, e.g. 'EPSG:4326' (requires rasterio)
+        None: bbox is in the CRS of each granule
+    predicate : callable, optional
+        takes the granule header and returns
+        whether to parse the granule
+    lazy, record : bool
+        see parse_granule_metadata
+    max_workers : int, optional
+        number of threads parsing granules
+    index_cache : zipindex.ZipIndexCache, optional
+        see ProductHandle
+
+    Returns
+    -------
+    dict
+        tile name -> granule meta data
+    """
+    predicates = []
+    if tile_names is not None:
+        tile_names = {tile_name.upper().lstrip('T') for tile_name in tile_names}
+        predicates.append(lambda header: header['tile_name'] in tile_names)
+    if bbox is not None:
+        predicates.append(_bbox_predicate(bbox, bbox_crs))
+    if predicate is not None:
+        predicates.append(predicate)
+
+    def _parse(name):
+        return parse_granule_metadata(metadatastr=handle.read(name), lazy=lazy, record=record)
+
+    with open_product(infile, index_cache=index_cache) as handle:
+        names = metafile.find_granule_metafiles_in_handle(handle)
+        if tile_names is not None:
+            # granule folder names contain the tile name
+            names = [
+                name for name in names
+                if any('T' + tile_name in name for tile_name in tile_names)]
+        selected = []
+        for name in names:
+            with handle.open(name) as f:
+                header = scan_granule_header(f)
+            if all(p(header) for p in predicates):
+                selected.append(name)
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            granules = list(executor.map(_parse, selected))
+    return {gmeta['tile_name']: gmeta for gmeta in granules}
 
 
 def parse_metadata_xml(root):
     """Parse S2 PRODUCT meta data XML"""
-    _get_single = functools.partial(converters.get_single, root)
-    metadata = {
-        'title': _get_title_any_level(root),
-        'sensing_time': converters.get_single_date(root, 'PRODUCT_START_TIME'),
-        'processing_level': _get_single('PROCESSING_LEVEL')}
+    root = (PRODUCT_SCHEMA + PRODUCT_L1C_SCHEMA).index(root)
+    metadata = PRODUCT_SCHEMA.extract(root)
+    if metadata['title'] is None:
+        metadata['title'] = converters.get_single(root, 'PRODUCT_URI_2A')
+    spacecraft_name = metadata.pop('spacecraft_name')
     if metadata['processing_level'] == 'Level-1C':
-        metadata.update({
-            'orbit_direction': _get_single('SENSING_ORBIT_DIRECTION'),
-            'quantification_value': _get_single('QUANTIFICATION_VALUE', to_type=int),
-            'reflectance_conversion': _get_single(
-                'Reflectance_Conversion/U', to_type=float),
-            'irradiance_values': converters.get_all(
-                root,
-                'Reflectance_Conversion/Solar_Irradiance_List/SOLAR_IRRADIANCE', to_type=float)})
-    metadata['spacecraft'] = _spacecraft_from_spacecraft_name(_get_single('SPACECRAFT_NAME'))
+        metadata.update(PRODUCT_L1C_SCHEMA.extract(root))
+    metadata['spacecraft'] = _spacecraft_from_spacecraft_name(spacecraft_name)
     return metadata
 
 
 def find_parse_metadata(
-        infile, check_granules=False, flatten_single_granule=False):
+        infile, check_granules=False, flatten_single_granule=False, lazy=False,
+        index_cache=None):
     """Find and parse product and granule meta data in SAFE or zip file
 
     Parameters
     ----------
-    infile : str
+    infile : str or ProductHandle
         path to input file SAFE or zip
+        or product opened with satmeta.product.ProductHandle
+        or URL or byte-range source of a zip (see satmeta.rangeio)
     check_granules : bool
         check whether granules were loaded
     flatten_single_granule : bool
         merge granule metadata into metadata dictionary
+    lazy : bool
+        granule metadata as LazyMetadata
+        see parse_granule_metadata
+    index_cache : zipindex.ZipIndexCache, optional
+        read the zip member index from this cache
+        see ProductHandle
 
     Returns
     -------
     product meta data dictionary with 'granules' key
     """
-    mstr = metafile.find_read_metafile(infile)
-    metadata = parse_metadata(metadatastr=mstr)
-    gmeta = find_parse_granule_metadata(infile)
+    with open_product(infile, index_cache=index_cache) as handle:
+        metadata = parse_metadata(metadatastr=metafile.read_metafile_handle(handle))
+        gmeta = find_parse_granule_metadata(handle, lazy=lazy)
     if check_granules and not gmeta:
         raise ValueError(
-                'No granule metadata found in file \'{}\'.'.format(infile))
+                'No granule metadata found in file \'{}\'.'.format(handle.path))
 
     if flatten_single_granule:
         if len(gmeta) != 1:
@@ -207,10 +530,16 @@ def find_parse_metadata(
     return metadata
 
 
-def find_parse_granule_metadata(infile, tile_name=None):
-    """Find and parse granule meta data in SAFE or zip"""
+def find_parse_granule_metadata(
+        infile, tile_name=None, lazy=False, record=False, index_cache=None):
+    """Find and parse granule meta data in SAFE or zip
+
+    infile can be a path or a satmeta.product.ProductHandle
+    index_cache is passed to ProductHandle
+    """
     granulesdict = {}
-    for mstr in metafile.find_read_granule_metafiles(infile, tile_name=tile_name):
-        gmeta = parse_granule_metadata(metadatastr=mstr)
-        granulesdict[gmeta['tile_name']] = gmeta
+    with open_product(infile, index_cache=index_cache) as handle:
+        for mstr in metafile.find_read_granule_metafiles_handle(handle, tile_name=tile_name):
+            gmeta = parse_granule_metadata(metadatastr=mstr, lazy=lazy, record=record)
+            granulesdict[gmeta['tile_name']] = gmeta
     return granulesdict
@@ -6,17 +6,12 @@ import zipfile
 import logging
 
 from ..exceptions import MetaDataError
+from ..product import ProductHandle
+from ..rangeio import is_range_source
 
 logger = logging.getLogger(__name__)
 
 
-def _ensure_str(s):
-    try:
-        return s.decode('utf-8')
-    except AttributeError:
-        return s
-
-
 def find_metafile_in_SAFE(inSAFE):
     """Find metafile in SAFE folder"""
     def _filterfunc(fn):
@@ -32,9 +27,8 @@ def find_metafile_in_SAFE(inSAFE):
 def read_metafile_SAFE(inSAFE):
     """Find and read metafile file in SAFE folder"""
     metafile = find_metafile_in_SAFE(inSAFE)
-    with open(metafile) as f:
-        mstr = f.read()
-    return _ensure_str(mstr)
+    with open(metafile, 'rb') as f:
+        return f.read()
 
 
 def find_metafile_in_zip(names):
@@ -49,42 +43,67 @@ def find_metafile_in_zip(names):
         raise RuntimeError('No metadata file found among zip file names.')
 
 
-def read_metafile_ZIP(zipfilepath):
+def read_metafile_ZIP(zipfilepath, index_cache=None):
     """Find and read metadata file in zip file
 
     Parameters
     ----------
-    zipfilepath : str
-        path to zip file
+    zipfilepath : str or rangeio.RangeReader
+        path to zip file, URL or byte-range source
+        (read via ProductHandle, see rangeio.open_range_reader)
+    index_cache : zipindex.ZipIndexCache, optional
+        read the member index from this cache
+        and seek directly to the metadata file
 
     Returns
     -------
-    str
-        metadata as string
+    bytes
+        metadata file contents
     """
+    if index_cache is not None or is_range_source(zipfilepath):
+        with ProductHandle(zipfilepath, index_cache=index_cache) as handle:
+            return read_metafile_handle(handle)
     try:
         with zipfile.ZipFile(zipfilepath) as zf:
             metafile = find_metafile_in_zip(zf.namelist())
-            mstr = zf.open(metafile).read()
-            return _ensure_str(mstr)
+            return zf.read(metafile)
     except zipfile.BadZipfile as e:
         raise MetaDataError('Unable to read zip file \'{}\': {}'.format(zipfilepath, e))
 
 
+def find_metafile_in_handle(handle):
+    """Find metadata file among the members of a ProductHandle"""
+    names = [
+        name for name in handle.filter('*.xml')
+        if '/' not in name and 'INSPIRE' not in name]
+    try:
+        return names[0]
+    except IndexError:
+        # same error as find_metafile_in_zip
+        raise RuntimeError('No metadata file found among zip file names.')
+
+
+def read_metafile_handle(handle):
+    """Find and read metadata file in ProductHandle"""
+    return handle.read(find_metafile_in_handle(handle))
+
+
 def find_read_metafile(input_path):
     """Find and read metadata file in input file (SAFE or ZIP)
 
     Parameters
     ----------
-    input_path : str
+    input_path : str or ProductHandle
         path to input file or folder
 
     Returns
     -------
-    str
-        metadata as string
+    bytes
+        metadata file contents
     """
-    if os.path.isdir(input_path):
+    if isinstance(input_path, ProductHandle):
+        return read_metafile_handle(input_path)
+    if not is_range_source(input_path) and os.path.isdir(input_path):
         return read_metafile_SAFE(input_path)
     else:
         return read_metafile_ZIP(input_path)
@@ -157,39 +176,103 @@ def find_granule_metafiles_in_zip_names(names, tile_regex='', tile_name=None):
     return members
 
 
-def find_read_granule_metafiles_ZIP(zipfilepath, **findkwargs):
+def find_read_granule_metafiles_ZIP(zipfilepath, index_cache=None, **findkwargs):
     """Read granule metadata files in ZIP archive
 
     Parameters
     ----------
-    zipfilepath : str
-        path to zip file
+    zipfilepath : str or rangeio.RangeReader
+        path to zip file, URL or byte-range source
+        (read via ProductHandle, see rangeio.open_range_reader)
+    index_cache : zipindex.ZipIndexCache, optional
+        read the member index from this cache
+        and seek directly to the metadata files
     **findkwargs : additional keyword arguments
         passed to find_granule_metafiles_in_zip_names
 
     Yields
     ------
-    str
-        metadata file contents as string
+    bytes
+        metadata file contents
     """
+    if index_cache is not None or is_range_source(zipfilepath):
+        with ProductHandle(zipfilepath, index_cache=index_cache) as handle:
+            yield from find_read_granule_metafiles_handle(handle, **findkwargs)
+        return
     try:
         with zipfile.ZipFile(zipfilepath) as zf:
             names = zf.namelist()
             metafiles = find_granule_metafiles_in_zip_names(names, **findkwargs)
             logger.debug('Found %d granule metadata files.', len(metafiles))
             for metafile in metafiles:
-                mstr = zf.open(metafile).read()
-                yield _ensure_str(mstr)
+                yield zf.read(metafile)
     except zipfile.BadZipfile as e:
         raise MetaDataError('Unable to read zip file \'{}\': {}'.format(zipfilepath, str(e)))
 
 
+def find_granule_metafiles_in_handle(handle, tile_regex='', tile_name=None):
+    """Find granule metadata files among the members of a ProductHandle
+
+    Parameters
+    ----------
+    handle : ProductHandle
+        opened product
+    tile_regex : str, optional
+        granule search pattern
+        e.g. '32[A-Z]{3}'
+    tile_name : str, optional
+        granule name
+        e.g. '32UPF'
+        overrides tile_regex
+
+    Returns
+    -------
+    list of str
+        member names
+    """
+    if tile_name is not None:
+        tile_regex = 'T{}'.format(tile_name.upper().lstrip('T'))
+    # the regex backtracks heavily on long names, so only apply it to
+    # the few xml files in GRANULE and not to all members
+    compiled_pattern = re.compile(
+        r'GRANULE/([\w_\.]*?)' + tile_regex + r'([\w_\.]*?)/([\w_\.]*?\.xml)$')
+    members = [
+        name for name in handle.filter('GRANULE/*.xml')
+        if compiled_pattern.match(name)]
+    if not members and not handle.is_dir:
+        raise ValueError(
+                'No granule metadata files found in \'{}\' with tile pattern \'{}\'.'
+                .format(handle.path, tile_regex))
+    return members
+
+
+def find_read_granule_metafiles_handle(handle, **findkwargs):
+    """Read granule metadata files in ProductHandle
+
+    Parameters
+    ----------
+    handle : ProductHandle
+        opened product
+    **findkwargs : additional keyword arguments
+        passed to find_granule_metafiles_in_handle
+
+    Yields
+    ------
+    bytes
+        metadata file contents
+    """
+    metafiles = find_granule_metafiles_in_handle(handle, **findkwargs)
+    logger.debug('Found %d granule metadata files.', len(metafiles))
+    for metafile in metafiles:
+        yield handle.read(metafile)
+
+
 def find_read_granule_metafiles(input_path, tile_name=None, **findkwargs):
     """Find and read granule metadata files in ZIP or SAFE
 
     Parameters
     ----------
-    input_path : str
+    input_path : str or ProductHandle
         path to SAFE folder or ZIP file
     tile_name : str
         tile name
@@ -199,26 +282,27 @@ def find_read_granule_metafiles(input_path, tile_name=None, **findkwargs):
 
     Yields
     ------
-    str
-        metadata file contents as string
+    bytes
+        metadata file contents
     """
-    if os.path.isdir(input_path):
+    if isinstance(input_path, ProductHandle):
+        yield from find_read_granule_metafiles_handle(
+                input_path, tile_name=tile_name, **findkwargs)
+    elif not is_range_source(input_path) and os.path.isdir(input_path):
         for fn in find_granule_metafiles_in_SAFE(
                 input_path, tile_name=tile_name, **findkwargs):
-            with open(fn) as fin:
-                mstr = fin.read()
-            yield _ensure_str(mstr)
+            with open(fn, 'rb') as fin:
+                yield fin.read()
     else:
-        for mstr in find_read_granule_metafiles_ZIP(
-                input_path, tile_name=tile_name, **findkwargs):
-            yield _ensure_str(mstr)
+        yield from find_read_granule_metafiles_ZIP(
+                input_path, tile_name=tile_name, **findkwargs)
 
 
 def extract_metafile(input_path, outfile):
     """Extract and save metadata file"""
     mstr = find_read_metafile(input_path)
     with open(outfile, 'wb') as fout:
-        fout.write(mstr.encode("UTF-8"))
+        fout.write(mstr)
 
 
 def extract_single_granule_metafile(input_path, outfile, tile_name):
@@ -230,7 +314,7 @@ def extract_single_granule_metafile(input_path, outfile, tile_name):
                 'No granule metadata file found in \'{}\' '
                 'for tile name \'{}\'.'.format(input_path, tile_name))
     with open(outfile, 'wb') as fout:
-        fout.write(mstr.encode("UTF-8"))
+        fout.write(mstr)
 
 
 def extract_granule_metafiles_ZIP(zipfilepath, outdir, tile_name=None, **findkwargs):
@@ -0,0 +1,128 @@
+import os
+import logging
+import concurrent.futures
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+from satmeta.exceptions import MetaDataError
+from . import meta as s2meta
+
+logger = logging.getLogger(__name__)
+
+# product fields copied to every granule record
+_product_keys = ['title', 'sensing_time', 'processing_level', 'spacecraft', 'orbit_direction']
+
+# scalar granule fields copied to the records
+_granule_keys = [
+    'tile_ID', 'tile_name', 'projection', 'cloud_cover_percentage',
+    'sun_zenith', 'sun_azimuth']
+
+# maximum footprint edge length in tile CRS units before reprojection
+_segment_length = 10000
+
+
+def get_granule_records(infile):
+    """Get one flat metadata record per granule
+
+    Parameters
+    ----------
+    infile : str
+        path to S2 data file (zip or SAFE)
+
+    Returns
+    -------
+    list of dict
+        product and scalar granule fields,
+        'bounds' (left bottom right top in the tile CRS
+        given by 'projection') and 'filepath' (=infile)
+    """
+    metadata = s2meta.find_parse_metadata(infile, lazy=True)
+    product = {key: metadata.get(key) for key in _product_keys}
+    records = []
+    for gmeta in metadata['granules'].values():
+        record = dict(product)
+        record.update((key, gmeta[key]) for key in _granule_keys)
+        image_bounds = gmeta['image_bounds']
+        record['bounds'] = tuple(image_bounds[min(image_bounds)])
+        record['filepath'] = infile
+        records.append(record)
+    return records
+
+
+def _get_granule_records_failsafe(infile):
+    try:
+        return get_granule_records(infile)
+    except (MetaDataError, OSError) as me:
+        return me
+    except Exception as e:
+        # any failure (e.g. XMLSyntaxError, KeyError) only skips this file
+        # returned as MetaDataError so it pickles back from the process pool
+        return MetaDataError('{}: {}'.format(type(e).__name__, e))
+
+
+def _footprints(df, crs):
+    """Footprint polygons in crs from bounds and projection columns"""
+    footprints = gpd.GeoSeries(index=df.index, crs=crs, dtype='geometry')
+    for projection, group in df.groupby('projection'):
+        left, bottom, right, top = zip(*group['bounds'])
+        boxes = shapely.segmentize(shapely.box(left, bottom, right, top), _segment_length)
+        footprints[group.index] = gpd.GeoSeries(
+            boxes, index=group.index, crs=projection).to_crs(crs)
+    return footprints
+
+
+def _merge_records(records, crs):
+    df = pd.DataFrame.from_records(records, columns=(
+        _product_keys + _granule_keys + ['bounds', 'filepath']))
+    df['footprint'] = _footprints(df, crs)
+    return gpd.GeoDataFrame(df, geometry='footprint', crs=crs)
+
+
+def meta_as_geopandas(
+        infiles, multiprocessing_above=40, max_workers=None, chunksize=None,
+        crs='EPSG:4326'):
+    """Get granule metadata as GeoDataFrame
+
+    Parameters
+    ----------
+    infiles : list of str
+        paths to S2 data files
+    multiprocessing_above : int
+        use multiprocessing above this number of input files
+        set to None to disable
+    max_workers : int, optional
+        number of processes
+        default: number of CPUs
+    chunksize : int, optional
+        number of files per task sent to a process
+        default: about four tasks per process
+    crs : str
+        CRS of the footprints
+
+    Returns
+    -------
+    gdf : GeoDataFrame
+        one row per granule with product and granule fields,
+        'bounds' in the tile CRS, 'filepath' and
+        'footprint' geometry (tile extent) in crs
+    """
+    if multiprocessing_above is not None and len(infiles) > multiprocessing_above:
+        max_workers = max_workers or os.cpu_count()
+        if chunksize is None:
+            chunksize = max(1, len(infiles) // (max_workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            results = list(executor.map(
+                _get_granule_records_failsafe, infiles, chunksize=chunksize))
+    else:
+        results = [_get_granule_records_failsafe(infile) for infile in infiles]
+    records = []
+    for infile, result in zip(infiles, results):
+        if isinstance(result, Exception):
+            logger.warning(
+                    'Reading metadata from \'%s\' failed with error \'%s\'.',
+                    infile, result)
+            continue
+        records.extend(result)
+    return _merge_records(records, crs)
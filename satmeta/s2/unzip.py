@@ -4,6 +4,8 @@ import zipfile
 import fnmatch
 import logging
 
+from ..product import open_product
+
 logger = logging.getLogger(__name__)
 
 
@@ -94,18 +96,19 @@ def get_bandfile_urls(infile, bands, tile=None):
 
     Parameters
     ----------
-    infile : str
+    infile : str or ProductHandle
         path to .zip file
+        or product opened with satmeta.product.ProductHandle
+        for SAFE folders, file paths are returned
     bands : list of str
         bands to get
     tile : str, optional
         tile to get bands from
         required for old format multi-tile products
     """
-    names = get_names_in_file(infile)
     urls = []
-    for band in bands:
-        bfpath = find_band_file_in_archive(names, band=band, tile=tile)
-        url = generate_member_url(infile, bfpath)
-        urls.append(url)
+    with open_product(infile) as handle:
+        for band in bands:
+            bfpath = find_band_file_in_archive(handle.names, band=band, tile=tile)
+            urls.append(handle.member_url(bfpath))
     return urls
@@ -1,8 +1,6 @@
-import affine
-
-
 def kw_to_affine(ULX, ULY, COL_STEP, ROW_STEP):
     """Convert meta data keys to affine transform"""
+    import affine
     return affine.Affine(COL_STEP, 0, ULX, 0, -ROW_STEP, ULY)
 
 
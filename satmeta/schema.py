@@ -0,0 +1,104 @@
+"""Declarative meta data field schemas
+
+A mission declares its fields once and the schema
+extracts all of them from a single indexing pass over the XML tree.
+"""
+from satmeta import converters
+
+
+class Field(object):
+    """Declaration of a single meta data field
+
+    Parameters
+    ----------
+    path : str
+        tag expression relative to the root
+        see converters.get_elements
+    attrname : str, optional
+        get this attribute instead of the element text
+    to_type : callable, optional
+        convert value(s) with this function
+    many : bool
+        get a list of all instances
+        instead of a single value
+    index : int, optional
+        get this instance instead of
+        requiring exactly one
+    required : bool
+        raise if the field is missing
+        otherwise return default
+    default : object
+        value for missing optional fields
+    """
+
+    __slots__ = ('path', 'attrname', 'to_type', 'many', 'index', 'required', 'default')
+
+    def __init__(
+            self, path, attrname=None, to_type=None, many=False, index=None,
+            required=True, default=None):
+        self.path = path
+        self.attrname = attrname
+        self.to_type = to_type
+        self.many = many
+        self.index = index
+        self.required = required
+        self.default = default
+
+    def __repr__(self):
+        return 'Field({!r})'.format(self.path)
+
+    def _extract(self, root):
+        kw = dict(attrname=self.attrname, to_type=self.to_type)
+        if self.many:
+            return converters.get_all(root, self.path, **kw)
+        elif self.index is not None:
+            return converters.get_instance(root, self.path, index=self.index, **kw)
+        else:
+            return converters.get_single(root, self.path, **kw)
+
+    def extract(self, root):
+        """Get field value from XML root"""
+        if self.required:
+            return self._extract(root)
+        try:
+            return self._extract(root)
+        except (ValueError, IndexError, KeyError):
+            return self.default
+
+
+class Schema(object):
+    """Collection of fields extracted together
+
+    Parameters
+    ----------
+    fields : dict
+        output key -> Field
+    """
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self.tagnames = [field.path for field in self.fields.values()]
+
+    def index(self, root):
+        """Index XML root for all fields in one traversal"""
+        return converters.IndexedRoot(root, tagnames=self.tagnames)
+
+    def extract(self, root):
+        """Extract all fields from XML root
+
+        Parameters
+        ----------
+        root : lxml XML root or converters.IndexedRoot
+            an IndexedRoot is used as is
+
+        Returns
+        -------
+        dict
+            output key -> value
+        """
+        if not isinstance(root, converters.IndexedRoot):
+            root = self.index(root)
+        return {key: field.extract(root) for key, field in self.fields.items()}
+
+    def __add__(self, other):
+        return Schema({**self.fields, **other.fields})
@@ -3,7 +3,7 @@
 def resample(
         source, src_transform, src_crs, dst_shape,
         dst_transform=None, dst_crs=None,
-        resampling=None, **reprojectkw):
+        resampling=None, dtype='f8', out=None, **reprojectkw):
     """Resample data
 
     Parameters
@@ -26,6 +26,12 @@ def resample(
         resampling method
         see rasterio.warp.Resampling
         default: Resampling.bilinear
+    dtype : str or numpy.dtype
+        output data type
+    out : ndarray, optional
+        array of dst_shape to write the output to
+        instead of allocating a new one
+        dtype is ignored
     **reprojectkw : additional keyword arguments
         passed to rasterio.warp.reproject
 
@@ -44,7 +50,11 @@ def resample(
     if resampling is None:
         resampling = rasterio.warp.Resampling.bilinear
 
-    destination = np.zeros(dst_shape, 'f8')
+    if out is None:
+        destination = np.zeros(dst_shape, dtype)
+    else:
+        destination = _check_out(out, dst_shape)
+        destination.fill(0)
     rasterio.warp.reproject(
         source=source,
         destination=destination,
@@ -56,3 +66,192 @@ def resample(
         **reprojectkw)
 
     return destination
+
+
+def _cubic_kernel(x, a=-0.5):
+    """Keys cubic convolution kernel"""
+    import numpy as np
+    x = np.abs(x)
+    return np.where(
+        x <= 1, ((a + 2) * x - (a + 3)) * x * x + 1,
+        np.where(x < 2, ((a * x - 5 * a) * x + 8 * a) * x - 4 * a, 0))
+
+
+def _interp_matrix(src_size, positions, interp='bilinear'):
+    """Interpolation weights along one axis
+
+    Parameters
+    ----------
+    src_size : int
+        number of source pixels
+    positions : ndarray (n,)
+        fractional source pixel index of each output pixel center
+        0 is the center of the first source pixel
+        positions outside the source are clamped to the edge
+    interp : str in ['nearest', 'bilinear', 'bicubic']
+        interpolation method
+
+    Returns
+    -------
+    ndarray (n, src_size) float64
+    """
+    import numpy as np
+    positions = np.clip(positions, 0, src_size - 1)
+    weights = np.zeros((len(positions), src_size))
+    rows = np.arange(len(positions))
+    if interp == 'nearest':
+        weights[rows, np.floor(positions + 0.5).astype(int).clip(0, src_size - 1)] = 1
+        return weights
+    if interp == 'bilinear':
+        offsets = np.arange(0, 2)
+        kernel = lambda d: np.maximum(1 - np.abs(d), 0)
+    elif interp == 'bicubic':
+        offsets = np.arange(-1, 3)
+        kernel = _cubic_kernel
+    else:
+        raise ValueError(
+            'interp must be one of {}.'.format(['nearest', 'bilinear', 'bicubic']))
+    base = np.floor(positions).astype(int)
+    for offset in offsets:
+        index = base + offset
+        w = kernel(positions - index)
+        # taps outside the source fall back to the edge pixel
+        np.add.at(weights, (rows, index.clip(0, src_size - 1)), w)
+    return weights
+
+
+def resample_separable(
+        source, src_transform, dst_shape, dst_transform=None,
+        interp='bilinear', dtype='f4', out=None):
+    """Resample data in the same CRS with separable interpolation
+
+    Interpolation weights are computed for rows and columns
+    separately and applied as two matrix products,
+    so no warping machinery is needed.
+    Only for north-up transforms without rotation.
+
+    Parameters
+    ----------
+    source : ndarray (rows, cols)
+        source data
+        NaN propagates to all output pixels
+        with a non-zero weight on them
+    src_transform : affine.Affine
+        source transformation
+    dst_shape : tuple
+        output shape
+    dst_transform : affine.Affine, optional
+        destination transform
+        default: source extent divided into dst_shape
+    interp : str in ['nearest', 'bilinear', 'bicubic']
+        interpolation method
+    dtype : str or numpy.dtype
+        output data type
+    out : ndarray, optional
+        C-contiguous array of dst_shape
+        to write the output to
+        instead of allocating a new one
+        dtype is ignored
+
+    Returns
+    -------
+    ndarray : resampled data
+    """
+    import numpy as np
+
+    if out is not None:
+        _check_out(out, dst_shape)
+        dtype = out.dtype
+    if src_transform.b or src_transform.d:
+        raise ValueError('Rotated transforms are not supported.')
+    nrows, ncols = dst_shape
+    if dst_transform is None:
+        dst_transform = src_transform * src_transform.scale(
+            source.shape[1] / ncols, source.shape[0] / nrows)
+    if dst_transform.b or dst_transform.d:
+        raise ValueError('Rotated transforms are not supported.')
+
+    def _positions(n, src_offset, src_step, dst_offset, dst_step):
+        centers = dst_offset + (np.arange(n) + 0.5) * dst_step
+        return (centers - src_offset) / src_step - 0.5
+
+    wrows = _interp_matrix(source.shape[0], _positions(
+        nrows, src_transform.f, src_transform.e, dst_transform.f, dst_transform.e),
+        interp=interp).astype(dtype)
+    wcols = _interp_matrix(source.shape[1], _positions(
+        ncols, src_transform.c, src_transform.a, dst_transform.c, dst_transform.a),
+        interp=interp).astype(dtype)
+
+    nan = np.isnan(source)
+    source = np.where(nan, 0, source).astype(dtype)
+    destination = np.dot(wrows.dot(source), wcols.T, out=out)
+    # NaN where a NaN source pixel has a non-zero weight
+    rows_hit = (wrows != 0).dot(nan)
+    cols_hit = wcols != 0
+    for col in np.nonzero(nan.any(axis=0))[0]:
+        destination[np.ix_(rows_hit[:, col], cols_hit[:, col])] = np.nan
+    return destination
+
+
+def _check_out(out, shape):
+    """Check that out array has shape"""
+    if out.shape != tuple(shape):
+        raise ValueError(
+            'out has shape {} but must have {}.'.format(out.shape, tuple(shape)))
+    return out
+
+
+class BufferPool(object):
+    """Output arrays reused across calls
+
+    Arrays are keyed by name, shape and dtype.
+    The same array is returned every time a key is requested,
+    so results written to it are overwritten by the next call
+    using the same key. Copy results that must be kept.
+
+    Example
+    -------
+    >>> buffers = BufferPool()
+    >>> for fn in granule_files:
+    ...     angles = parse_resample_angles(fn, ..., buffers=buffers)
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape, dtype='f8'):
+        """Get array for name, shape and dtype
+
+        Parameters
+        ----------
+        name : hashable
+            buffer name
+        shape : tuple
+            array shape
+        dtype : str or numpy.dtype
+            array data type
+
+        Returns
+        -------
+        ndarray
+            uninitialized on first request
+        """
+        import numpy as np
+        key = (name, tuple(shape), np.dtype(dtype).str)
+        try:
+            return self._buffers[key]
+        except KeyError:
+            buf = self._buffers[key] = np.empty(shape, dtype)
+            return buf
+
+    def clear(self):
+        """Release all arrays"""
+        self._buffers.clear()
+
+    def __len__(self):
+        return len(self._buffers)
+
+    @property
+    def nbytes(self):
+        """Total size of all arrays in bytes"""
+        return sum(buf.nbytes for buf in self._buffers.values())
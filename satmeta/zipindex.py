@@ -0,0 +1,360 @@
+"""Persistent index of zip central directories for direct member reads"""
+import io
+import os
+import json
+import zlib
+import struct
+import hashlib
+import zipfile
+import logging
+
+from .exceptions import MetaDataError
+
+logger = logging.getLogger(__name__)
+
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+_CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+_CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+_END_RECORD = struct.Struct('<4s4H2LH')
+_END_RECORD_SIGNATURE = b'PK\x05\x06'
+_END_LOCATOR64 = struct.Struct('<4sLQL')
+_END_LOCATOR64_SIGNATURE = b'PK\x06\x07'
+_END_RECORD64 = struct.Struct('<4sQ2H2L4Q')
+_END_RECORD64_SIGNATURE = b'PK\x06\x06'
+_MAX_COMMENT = 0xffff
+# bytes read after the local header name in the same request
+# to cover its extra field (usually < 40 bytes)
+_EXTRA_SLACK = 256
+_INDEX_VERSION = 1
+
+
+def _find_end_record(reader):
+    """Offset and fields of the end of central directory record
+
+    Tries the record without comment first (one small read)
+    and falls back to searching the maximum comment length.
+    """
+    size = reader.size
+    tail_size = _END_RECORD.size + _END_LOCATOR64.size
+    for length in [tail_size, tail_size + _MAX_COMMENT]:
+        start = max(0, size - length)
+        tail = reader.read(start, size - start)
+        pos = tail.rfind(_END_RECORD_SIGNATURE)
+        if pos >= 0 and len(tail) - pos >= _END_RECORD.size:
+            return start + pos, _END_RECORD.unpack_from(tail, pos), tail[:pos]
+        if start == 0:
+            break
+    raise MetaDataError('End of central directory not found in \'{}\'.'.format(reader.name))
+
+
+def _central_directory_range(reader):
+    """Offset and size of the central directory (ZIP64 aware)"""
+    end_offset, end, before = _find_end_record(reader)
+    cd_size, cd_offset = end[5], end[6]
+    if cd_offset == 0xffffffff or cd_size == 0xffffffff or end[4] == 0xffff:
+        if len(before) < _END_LOCATOR64.size:
+            before = reader.read(end_offset - _END_LOCATOR64.size, _END_LOCATOR64.size)
+        locator = _END_LOCATOR64.unpack_from(before, len(before) - _END_LOCATOR64.size)
+        if locator[0] == _END_LOCATOR64_SIGNATURE:
+            end64 = _END_RECORD64.unpack(reader.read(locator[2], _END_RECORD64.size))
+            if end64[0] != _END_RECORD64_SIGNATURE:
+                raise MetaDataError(
+                    'Bad ZIP64 end of central directory in \'{}\'.'.format(reader.name))
+            cd_size, cd_offset = end64[8], end64[9]
+    return cd_offset, cd_size
+
+
+def _zip64_extra(extra, file_size, compress_size, header_offset):
+    """Replace 0xffffffff sizes and offset with ZIP64 extra field values"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag, length = struct.unpack_from('<2H', extra, pos)
+        if tag == 1:
+            values = list(struct.unpack_from('<{}Q'.format(length // 8), extra, pos + 4))
+            if file_size == 0xffffffff:
+                file_size = values.pop(0)
+            if compress_size == 0xffffffff:
+                compress_size = values.pop(0)
+            if header_offset == 0xffffffff:
+                header_offset = values.pop(0)
+            break
+        pos += 4 + length
+    return file_size, compress_size, header_offset
+
+
+def _parse_central_directory(data):
+    """Index entries from central directory bytes"""
+    entries = {}
+    pos = 0
+    while pos + _CENTRAL_HEADER.size <= len(data):
+        header = _CENTRAL_HEADER.unpack_from(data, pos)
+        if header[0] != _CENTRAL_HEADER_SIGNATURE:
+            raise MetaDataError('Bad central directory file header.')
+        (flags, compress_type, crc, compress_size, file_size,
+         name_length, extra_length, comment_length) = header[3:5] + header[7:13]
+        header_offset = header[-1]
+        pos += _CENTRAL_HEADER.size
+        name = data[pos:pos + name_length]
+        name = name.decode('utf-8' if flags & 0x800 else 'cp437')
+        extra = data[pos + name_length:pos + name_length + extra_length]
+        pos += name_length + extra_length + comment_length
+        file_size, compress_size, header_offset = _zip64_extra(
+            extra, file_size, compress_size, header_offset)
+        entries[name] = (header_offset, compress_type, compress_size, file_size, crc)
+    return entries
+
+
+class _MemberStream(io.RawIOBase):
+    """Raw stream inflating a member while fetching it in chunks"""
+
+    def __init__(self, reader, offset, compress_type, compress_size, file_size, crc,
+                 name, chunk_size):
+        self._reader = reader
+        self._offset = offset
+        self._remaining = compress_size
+        self._decompressor = (
+            zlib.decompressobj(-zlib.MAX_WBITS)
+            if compress_type == zipfile.ZIP_DEFLATED else None)
+        self._file_size = file_size
+        self._crc = crc
+        self._name = name
+        self._chunk_size = chunk_size
+        self._buffer = b''
+        self._pos = 0
+        self._nread = 0
+        self._running_crc = 0
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        """Fetch and inflate chunks until the buffer has data or EOF"""
+        while not self._buffer and self._remaining:
+            size = min(self._chunk_size, self._remaining)
+            data = self._reader.read(self._offset, size)
+            self._offset += size
+            self._remaining -= size
+            if self._decompressor is not None:
+                data = self._decompressor.decompress(data)
+                if not self._remaining:
+                    data += self._decompressor.flush()
+            self._nread += len(data)
+            self._running_crc = zlib.crc32(data, self._running_crc)
+            self._buffer, self._pos = data, 0
+            if not self._remaining and (
+                    self._nread != self._file_size or self._running_crc != self._crc):
+                raise MetaDataError('Bad CRC or size for member \'{}\'.'.format(self._name))
+
+    def readinto(self, b):
+        if self._pos >= len(self._buffer):
+            self._buffer, self._pos = b'', 0
+            self._fill()
+        n = min(len(b), len(self._buffer) - self._pos)
+        b[:n] = self._buffer[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+class ZipIndex(object):
+    """Member offsets and sizes of a zip archive
+
+    Parameters
+    ----------
+    entries : dict
+        member name -> (header_offset, compress_type,
+        compress_size, file_size, CRC)
+    size, mtime : int, float
+        size and modification time of the archive
+        the index was built from
+    """
+
+    def __init__(self, entries, size=None, mtime=None):
+        self.entries = entries
+        self.size = size
+        self.mtime = mtime
+
+    @classmethod
+    def from_zipfile(cls, path):
+        """Build index by reading the central directory of path"""
+        st = os.stat(path)
+        try:
+            with zipfile.ZipFile(path) as zf:
+                entries = {
+                    info.filename: (
+                        info.header_offset, info.compress_type,
+                        info.compress_size, info.file_size, info.CRC)
+                    for info in zf.infolist()}
+        except zipfile.BadZipfile as e:
+            raise MetaDataError(
+                'Unable to read zip file \'{}\': {}'.format(path, e)) from e
+        return cls(entries, size=st.st_size, mtime=st.st_mtime)
+
+    @classmethod
+    def from_reader(cls, reader):
+        """Build index from a byte-range source
+
+        Only reads the end of central directory record
+        and the central directory.
+
+        Parameters
+        ----------
+        reader : rangeio.RangeReader
+            byte-range source of the archive
+        """
+        cd_offset, cd_size = _central_directory_range(reader)
+        entries = _parse_central_directory(reader.read(cd_offset, cd_size))
+        return cls(entries, size=reader.size)
+
+    def namelist(self):
+        """Member names in archive order"""
+        return sorted(self.entries, key=lambda name: self.entries[name][0])
+
+    def matches(self, path):
+        """Whether path has the size and mtime of the indexed archive"""
+        st = os.stat(path)
+        return st.st_size == self.size and st.st_mtime == self.mtime
+
+    def to_dict(self):
+        return dict(
+            version=_INDEX_VERSION, size=self.size, mtime=self.mtime,
+            entries=self.entries)
+
+    @classmethod
+    def from_dict(cls, d):
+        if d.get('version') != _INDEX_VERSION:
+            raise ValueError('Unsupported zip index version {}.'.format(d.get('version')))
+        entries = {name: tuple(entry) for name, entry in d['entries'].items()}
+        return cls(entries, size=d['size'], mtime=d['mtime'])
+
+    def supports(self, name):
+        """Whether member name is stored or deflated
+
+        Other compression types (e.g. bzip2, lzma)
+        are not read by read and open.
+        """
+        return self.entries[name][1] in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+
+    def read(self, reader, name):
+        """Read member name from archive byte-range source
+
+        Reads the member's local header and compressed bytes,
+        usually in a single request, and inflates them.
+
+        Parameters
+        ----------
+        reader : rangeio.RangeReader
+            byte-range source of the archive
+        name : str
+            member name
+
+        Returns
+        -------
+        bytes
+        """
+        header_offset, compress_type, compress_size, file_size, crc = self.entries[name]
+        # local name has the same length, extra field length is guessed
+        data_offset = _LOCAL_HEADER.size + len(name.encode('utf-8'))
+        chunk = reader.read(header_offset, data_offset + _EXTRA_SLACK + compress_size)
+        header = _LOCAL_HEADER.unpack_from(chunk)
+        if header[0] != _LOCAL_HEADER_SIGNATURE:
+            raise MetaDataError('Bad local file header for member \'{}\'.'.format(name))
+        name_length, extra_length = header[-2:]
+        data_offset = _LOCAL_HEADER.size + name_length + extra_length
+        data = chunk[data_offset:data_offset + compress_size]
+        if len(data) < compress_size:
+            data = reader.read(header_offset + data_offset, compress_size)
+        if compress_type == zipfile.ZIP_DEFLATED:
+            data = zlib.decompressobj(-zlib.MAX_WBITS).decompress(data)
+        elif compress_type != zipfile.ZIP_STORED:
+            raise MetaDataError(
+                'Compression type {} of member \'{}\' is not supported.'
+                .format(compress_type, name))
+        if len(data) != file_size or zlib.crc32(data) != crc:
+            raise MetaDataError('Bad CRC or size for member \'{}\'.'.format(name))
+        return data
+
+    def open(self, reader, name, chunk_size=65536):
+        """Open member name as stream fetching compressed chunks on demand
+
+        Reading only the start of a member (e.g. an XML header)
+        only fetches and inflates the first chunks.
+
+        Parameters
+        ----------
+        reader : rangeio.RangeReader
+            byte-range source of the archive
+        name : str
+            member name
+        chunk_size : int
+            compressed bytes per request
+
+        Returns
+        -------
+        io.BufferedReader
+        """
+        header_offset, compress_type, compress_size, file_size, crc = self.entries[name]
+        if not self.supports(name):
+            raise MetaDataError(
+                'Compression type {} of member \'{}\' is not supported.'
+                .format(compress_type, name))
+        header = _LOCAL_HEADER.unpack(reader.read(header_offset, _LOCAL_HEADER.size))
+        if header[0] != _LOCAL_HEADER_SIGNATURE:
+            raise MetaDataError('Bad local file header for member \'{}\'.'.format(name))
+        name_length, extra_length = header[-2:]
+        data_offset = header_offset + _LOCAL_HEADER.size + name_length + extra_length
+        return io.BufferedReader(_MemberStream(
+            reader, data_offset, compress_type, compress_size, file_size, crc,
+            name=name, chunk_size=chunk_size))
+
+
+class ZipIndexCache(object):
+    """Sidecar ZipIndex files stored in a directory
+
+    Indexes are keyed by the absolute path of the archive
+    and rebuilt when its size or modification time change.
+
+    Parameters
+    ----------
+    path : str
+        cache directory
+        created if it does not exist
+
+    Attributes
+    ----------
+    hits, misses : int
+        number of get calls that found / did not find a valid index
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.path)
+
+    def _filename(self, zippath):
+        key = hashlib.sha1(os.path.abspath(zippath).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, key + '.json')
+
+    def get(self, zippath):
+        """Get ZipIndex of zippath, building and storing it if needed"""
+        fn = self._filename(zippath)
+        try:
+            with open(fn) as f:
+                index = ZipIndex.from_dict(json.load(f))
+            if index.matches(zippath):
+                self.hits += 1
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+        self.misses += 1
+        index = ZipIndex.from_zipfile(zippath)
+        tmp = '{}.{}.tmp'.format(fn, os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump(index.to_dict(), f)
+        os.replace(tmp, fn)
+        logger.debug('Stored index of %d members of \'%s\'.', len(index.entries), zippath)
+        return index